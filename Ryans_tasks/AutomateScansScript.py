@@ -1,126 +1,279 @@
-import requests
 import argparse
+import os
 import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-def get_access_token(region, tenant_name, api_key):
-    if region == "":
-        url = f"https://iam.checkmarx.net/auth/realms/{tenant_name}/protocol/openid-connect/token"
-    else:
-        url = f"https://{region}.iam.checkmarx.net/auth/realms/{tenant_name}/protocol/openid-connect/token"
-    payload = f'grant_type=refresh_token&client_id=ast-app&refresh_token={api_key}'
-    headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-    response = requests.post(url, headers=headers, data=payload)
-    if response.status_code != 200:
-        raise Exception(f"Failed to get access token: {response.text}")
-    return response.json().get("access_token")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from cxone import auth, client, pagination, retry, scans
+from cxone.configcache import DEFAULT_CONFIG_CACHE, DEFAULT_CONFIG_TTL, ConfigCache, ProjectConfig
 
-def retrieve_projects(region, access_token):
-    if region == "":
-        url = "https://ast.checkmarx.net/api/projects/"
-    else:
-        url = f"https://{region}.ast.checkmarx.net/api/projects/"
+ACTIVE_SCAN_STATUSES = ["Queued", "Running"]
+DEFAULT_MAX_RUNNING = 10
+CAPACITY_POLL_INTERVAL = 30  # seconds between running-scan counts while the tenant is at capacity
+
+def project_filters(names=None, tags_keys=None, tags_values=None, groups=None):
+    """
+    Server-side filters for /api/projects/; list values are sent comma-separated.
+    """
+    filters = {
+        "names": names,
+        "tags-keys": tags_keys,
+        "tags-values": tags_values,
+        "groups": groups
+    }
+    return {key: ",".join(value) for key, value in filters.items() if value}
+
+def retrieve_projects(region, access_token, names=None, tags_keys=None, tags_values=None, groups=None,
+                      page_size=pagination.DEFAULT_PAGE_SIZE, workers=4):
+    """
+    Returns every project in the tenant, optionally filtered on the server by
+    exact names, tag keys/values and group IDs. Pages after the first are
+    fetched concurrently.
+    """
+    url = client.api_url(region, "/api/projects/")
     headers = {
         'Authorization': f'Bearer {access_token}',
         'Accept': '*/*; version=1.0'
     }
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        raise Exception(f"Failed to retrieve projects: {response.text}")
-    return response.json().get("projects", [])
+    params = project_filters(names, tags_keys, tags_values, groups)
+    try:
+        return pagination.fetch_all_pages(url, headers, params, "projects", page_size, workers)
+    except Exception as e:
+        raise Exception(f"Failed to retrieve projects: {e}")
 
-def get_project_config_params(region, access_token, project_id):
-    if region == "":
-        url = f"https://ast.checkmarx.net/api/configuration/project?project-id={project_id}"
-    else:
-        url = f"https://{region}.ast.checkmarx.net/api/configuration/project?project-id={project_id}"
+def get_project_config_params(region, access_token, project_id, cache=None):
+    """
+    Returns the project's configuration parameters as a ProjectConfig (iterable,
+    and indexed by key). With a ConfigCache, fresh entries are reused and stale
+    ones revalidated with a conditional request.
+    """
+    if cache is not None:
+        return cache.get(region, access_token, project_id)
+    url = client.api_url(region, f"/api/configuration/project?project-id={project_id}")
     headers = {
         'Authorization': f'Bearer {access_token}',
         'Accept': '*/*; version=1.0'
     }
-    response = requests.get(url, headers=headers)
+    response = client.get(url, headers=headers)
     if response.status_code == 404:
-        return []
+        return ProjectConfig([])
     if response.status_code != 200:
         raise Exception(f"Failed to get project config params for {project_id}: {response.status_code} {response.text}")
-    return response.json()
+    return ProjectConfig(response.json())
 
 def extract_repo_info_from_params(params):
-    repo_url = None
-    main_branch = None
-    repo_url = next(
-    (item["value"] for item in params if item["key"] == "scan.handler.git.repository"),
-    None
-)
-    main_branch = next(
-    (item["value"] for item in params if item["key"] == "scan.handler.git.branch"),
-    None
-)
+    if not isinstance(params, ProjectConfig):
+        params = ProjectConfig(params)
+    repo_url = params.value("scan.handler.git.repository")
+    main_branch = params.value("scan.handler.git.branch")
     return repo_url, main_branch
 
 def run_scan(region, access_token, project_id, scan_type="git", handler=None, tags=None, config=None):
-    if region == "":
-        url = "https://ast.checkmarx.net/api/scans/"
-    else:
-        url = f"https://{region}.ast.checkmarx.net/api/scans/"
+    url = client.api_url(region, "/api/scans/")
     headers = {
         'Authorization': f'Bearer {access_token}',
         'Accept': '*/*; version=1.0',
         'Content-Type': 'application/json'
     }
-    if handler is None:
-        handler = {}
-    if tags is None:
-        tags = {"ScanTag01": "", "ScanSeverity": "high"}
-    if config is None:
-        config = [
-            {
-                "type": "sast",
-                "value": {
-                    "incremental": "false",
-                    "presetName": "Checkmarx Default",
-                    "engineVerbose": "false"
-                }
-            },
-            {
-                "type": "sca",
-                "value": {
-                    "lastSastScanTime": "",
-                    "exploitablePath": "false"
-                }
-            }
-        ]
-    scan_payload = {
-        "project": {"id": project_id},
-        "type": scan_type,
-        "handler": handler,
-        "tags": tags,
-        "config": config
-    }
-    response = requests.post(url, json=scan_payload, headers=headers)
+    payload = scans.scan_payload(project_id, scan_type, handler, tags, config)
+    response = client.post(url, json=payload, headers=headers)
     if response.status_code not in (200, 201):
         raise Exception(f"Failed to start scan: {response.status_code} {response.text}")
     return response.json()
 
+def get_last_scan_times(region, access_token, page_size=100):
+    """
+    Returns {project ID: createdAt of its last scan} for every project that has one.
+    """
+    url = client.api_url(region, "/api/projects/last-scan")
+    headers = {
+        'Authorization': f'Bearer {access_token}',
+        'Accept': 'application/json; version=1.0'
+    }
+    last_scans = {}
+    offset = 0
+    while True:
+        params = {"offset": offset, "limit": page_size}
+        response = retry.request_with_retry("GET", url, params=params, headers=headers)
+        if response.status_code != 200:
+            raise Exception(f"Failed to get last scans: {response.status_code} {response.text}")
+        # the response maps project ID -> last scan
+        page = response.json() or {}
+        for project_id, scan in page.items():
+            last_scans[project_id] = scan.get("createdAt") or ""
+        if len(page) < page_size:
+            return last_scans
+        offset += page_size
+
+def count_active_scans(region, access_token):
+    """
+    Number of queued and running scans in the tenant (one list call with limit=1).
+    """
+    url = client.api_url(region, "/api/scans/")
+    headers = {
+        'Authorization': f'Bearer {access_token}',
+        'Accept': 'application/json; version=1.0'
+    }
+    params = {"statuses": ACTIVE_SCAN_STATUSES, "limit": 1}
+    response = retry.request_with_retry("GET", url, params=params, headers=headers)
+    if response.status_code != 200:
+        raise Exception(f"Failed to count active scans: {response.status_code} {response.text}")
+    data = response.json()
+    return data.get("filteredTotalCount", data.get("totalCount", 0))
+
+def order_by_staleness(projects, last_scan_times):
+    """
+    Projects that were never scanned first, then oldest last scan first.
+    """
+    return sorted(projects, key=lambda project: last_scan_times.get(project["id"], ""))
+
+def lookup_git_handler(region, token_provider, project, cache=None):
+    params = get_project_config_params(region, token_provider.get_token(), project["id"], cache)
+    repo_url, main_branch = extract_repo_info_from_params(params)
+    if repo_url and main_branch:
+        return {"repoUrl": repo_url.strip(), "branch": main_branch.strip()}
+    return None
+
+def schedule_fleet_scans(region, token_provider, projects, max_running=DEFAULT_MAX_RUNNING, window_seconds=0, workers=8,
+                         max_projects=None, poll_interval=CAPACITY_POLL_INTERVAL, config_cache=None, tracker=None):
+    """
+    Starts a git scan of every project (or the max_projects stalest), stalest first.
+
+    Configuration lookups run concurrently ahead of the submissions.
+    Submissions are spread evenly over window_seconds and never push the
+    tenant above max_running queued/running scans. The active count is
+    re-read from the server only when our own running tally reaches the cap.
+    Started scans are added to tracker, if given. Returns a summary dict.
+    """
+    access_token = token_provider.get_token()
+    last_scan_times = get_last_scan_times(region, access_token)
+    ordered = order_by_staleness(projects, last_scan_times)[:max_projects]
+    interval = window_seconds / len(ordered) if ordered and window_seconds else 0
+
+    summary = {"submitted": [], "skipped": [], "failed": []}
+    client.configure(pool_size=max(workers, client.DEFAULT_POOL_SIZE))
+    start = time.monotonic()
+    active = count_active_scans(region, access_token)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # lookups are submitted in priority order, so the next handler is usually ready when its turn comes
+        lookups = [executor.submit(lookup_git_handler, region, token_provider, project, config_cache) for project in ordered]
+        for index, (project, lookup) in enumerate(zip(ordered, lookups)):
+            try:
+                handler = lookup.result()
+            except Exception as e:
+                summary["failed"].append((project, str(e)))
+                continue
+            if handler is None:
+                summary["skipped"].append(project)
+                continue
+
+            delay = start + index * interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            while active >= max_running:
+                active = count_active_scans(region, token_provider.get_token())
+                if active >= max_running:
+                    print(f"{active} scans queued or running (max {max_running}); waiting {poll_interval}s")
+                    time.sleep(poll_interval)
+
+            try:
+                scan_result = run_scan(region, token_provider.get_token(), project["id"], scan_type="git", handler=handler)
+            except Exception as e:
+                summary["failed"].append((project, str(e)))
+                continue
+            active += 1
+            summary["submitted"].append((project, scan_result.get("id")))
+            if tracker is not None and scan_result.get("id"):
+                tracker.add(scan_result["id"])
+            print(f"Started scan {scan_result.get('id')} for {project['name']} "
+                  f"(last scan: {last_scan_times.get(project['id']) or 'never'})")
+    return summary
+
+def print_fleet_summary(summary):
+    print(f"Started {len(summary['submitted'])} scans, skipped {len(summary['skipped'])} projects without a git "
+          f"repository and branch, {len(summary['failed'])} failed.")
+    for project, error in summary["failed"]:
+        print(f"  {project['name']} ({project['id']}): {error}")
+
+def wait_for_scans(tracker, timeout=None):
+    """
+    Prints each tracked scan as it finishes; returns {status: count} of the finished scans.
+    """
+    print(f"Waiting for {len(tracker.pending)} scans to finish")
+    for scan in tracker.iter_finished(timeout):
+        print(f"Scan {scan['id']} finished: {scan['status']} ({len(tracker.pending)} still running)")
+    tracker.save()
+    counts = {}
+    for status in tracker.finished.values():
+        counts[status] = counts.get(status, 0) + 1
+    print("Finished scans: " + (", ".join(f"{count} {status}" for status, count in sorted(counts.items())) or "none"))
+    if tracker.pending:
+        print(f"{len(tracker.pending)} scans still running; run again with --track_only to keep waiting")
+    return counts
+
 def main():
-    parser = argparse.ArgumentParser(description='Performs scan on random project in tenant\'s account')
+    parser = argparse.ArgumentParser(description='Performs scan on random project in tenant\'s account, or on every project with --fleet')
     parser.add_argument('--region', required=True, help='Region for the API endpoint (e.g., us, eu)')
     parser.add_argument('--tenant_name', required=True, help='Tenant name')
     parser.add_argument('--api_key', required=True, help='API key for authentication')
+    parser.add_argument('--fleet', action='store_true', help='Scan every project, stalest first, instead of one random project')
+    parser.add_argument('--max_projects', type=int, help='With --fleet, only scan the N stalest projects')
+    parser.add_argument('--max_running', type=int, default=DEFAULT_MAX_RUNNING, help=f'With --fleet, maximum queued/running scans in the tenant (default: {DEFAULT_MAX_RUNNING})')
+    parser.add_argument('--window_minutes', type=float, default=0, help='With --fleet, spread submissions evenly over this many minutes')
+    parser.add_argument('--workers', type=int, default=8, help='With --fleet, concurrent configuration lookups')
+    parser.add_argument('--config_cache', default=DEFAULT_CONFIG_CACHE, help=f'Project configuration cache file (default: {DEFAULT_CONFIG_CACHE})')
+    parser.add_argument('--config_ttl', type=int, default=DEFAULT_CONFIG_TTL, help=f'Seconds a cached configuration is used before it is revalidated (default: {DEFAULT_CONFIG_TTL})')
+    parser.add_argument('--no_config_cache', action='store_true', help='Always download project configurations')
+    parser.add_argument('--wait', action='store_true', help='Wait for the started scans to finish')
+    parser.add_argument('--track_only', action='store_true', help='Start no scans; keep waiting for the scans recorded in --tracker_state')
+    parser.add_argument('--tracker_state', default='scan_tracker.json', help='File that records tracked scans per region and tenant so waiting can resume (default: scan_tracker.json)')
+    parser.add_argument('--wait_timeout', type=float, help='Stop waiting after this many minutes')
+    parser.add_argument('--project_names', nargs='+', help='Only consider projects with these exact names')
+    parser.add_argument('--tags_keys', nargs='+', help='Only consider projects with any of these tag keys')
+    parser.add_argument('--tags_values', nargs='+', help='Only consider projects with any of these tag values')
+    parser.add_argument('--groups', nargs='+', help='Only consider projects in any of these group IDs')
     args = parser.parse_args()
     region = args.region
     tenant_name = args.tenant_name
     api_key = args.api_key
 
-    access_token = get_access_token(region, tenant_name, api_key)
-    projects = retrieve_projects(region, access_token)
+    config_cache = None if args.no_config_cache else ConfigCache(args.config_cache, args.config_ttl)
+    token_provider = auth.get_provider(client.iam_base_url(region), tenant_name, api_key)
+    access_token = token_provider.get_token()
+    tracker = scans.ScanTracker(region, token_provider, args.tracker_state, tenant=tenant_name) if args.wait or args.track_only else None
+    wait_timeout = args.wait_timeout * 60 if args.wait_timeout else None
+    if args.track_only:
+        wait_for_scans(tracker, wait_timeout)
+        return
+    projects = retrieve_projects(region, access_token, args.project_names, args.tags_keys, args.tags_values, args.groups,
+                                 workers=args.workers)
     if not projects:
         print("No projects found in tenant account.")
         return
 
+    if args.fleet:
+        try:
+            summary = schedule_fleet_scans(region, token_provider, projects, args.max_running, args.window_minutes * 60, args.workers,
+                                           args.max_projects, config_cache=config_cache, tracker=tracker)
+        finally:
+            if config_cache is not None:
+                config_cache.save()
+        print_fleet_summary(summary)
+        if config_cache is not None:
+            print(f"Project configurations: {config_cache.hits} from cache, {config_cache.revalidated} revalidated, "
+                  f"{config_cache.fetched} downloaded")
+        if tracker is not None:
+            wait_for_scans(tracker, wait_timeout)
+        return
+
     project = random.choice(projects)
     print(f"Randomly selected project: {project['name']} (ID: {project['id']})")
 
-    params = get_project_config_params(region, access_token, project["id"])
+    params = get_project_config_params(region, access_token, project["id"], config_cache)
+    if config_cache is not None:
+        config_cache.save()
     repo_url, main_branch = extract_repo_info_from_params(params)
 
     if repo_url and main_branch:
@@ -134,6 +287,10 @@ def main():
             print(scan_result)
         except Exception as e:
             print(f"Failed to start scan: {e}")
+            return
+        if tracker is not None:
+            tracker.add(scan_result["id"])
+            wait_for_scans(tracker, wait_timeout)
     else:
         print("No valid repository URL or branch found for this project. Cannot run a Git scan.")
 
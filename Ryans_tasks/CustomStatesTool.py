@@ -1,9 +1,12 @@
+import os
 import sys
 import requests
 import argparse
-import time
 import json
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from cxone import auth, client
+
 # Standard global variables
 base_url = None
 tenant_name = None
@@ -11,7 +14,6 @@ auth_url = None
 iam_base_url = None
 api_key = None
 auth_token = None
-token_expiration = 0 # initialize so we have to authenticate
 debug = False
 
 def generate_auth_url():
@@ -26,7 +28,7 @@ def generate_auth_url():
             if debug:
                 print(f"Generated IAM base URL: {iam_base_url}")
         
-        temp_auth_url = f"{iam_base_url}/auth/realms/{tenant_name}/protocol/openid-connect/token"
+        temp_auth_url = client.token_url(iam_base_url, tenant_name)
         
         if debug:
             print(f"Generated authentication URL: {temp_auth_url}")
@@ -37,47 +39,19 @@ def generate_auth_url():
         sys.exit(1)
 
 def authenticate():
-    global auth_token, token_expiration
+    global auth_token
 
-    # if the token hasn't expired then we don't need to authenticate
-    if time.time() < token_expiration - 60:
-        if debug:
-            print("Token still valid.")
-        return
-    
+    # the shared provider reuses the token until shortly before it expires
     if debug:
         print("Authenticating with API key...")
-        
-    headers = {
-        'Content-Type': 'application/x-www-form-urlencoded',
-    }
-    data = {
-        'grant_type': 'refresh_token',
-        'client_id': 'ast-app',
-        'refresh_token': api_key
-    }
-    
-    try:
-        response = requests.post(auth_url, headers=headers, data=data)
-        response.raise_for_status()
-        
-        json_response = response.json()
-        auth_token = json_response.get('access_token')
-        if not auth_token:
-            print("Error: Access token not found in the response.")
-            sys.exit(1)
-        
-        expires_in = json_response.get('expires_in')
-        
-        if not expires_in:
-            expires_in = 600
 
-        token_expiration = time.time() + expires_in
+    try:
+        auth_token = auth.get_provider(iam_base_url, tenant_name, api_key).get_token()
 
         if debug:
             print("Authenticated successfully.")
-      
-    except requests.exceptions.RequestException as e:
+
+    except Exception as e:
         print(f"An error occurred during authentication: {e}")
         sys.exit(1)
 
@@ -113,7 +87,7 @@ def get_state_list():
 
     # make the API call
     try:
-        response = requests.request("GET", url, headers=headers)
+        response = client.request("GET", url, headers=headers)
 
         if (response.status_code == 200):
             custom_states = response.json()
@@ -149,7 +123,7 @@ def create_custom_state(state_name):
     }
 
     try:
-        response = requests.post(url, headers=headers, json=payload)
+        response = client.post(url, headers=headers, json=payload)
         
         # Check for successful creation (201) or other success codes
         if response.status_code in [200, 201]:
@@ -180,7 +154,7 @@ def delete_custom_state(state_id):
     }
 
     try:
-        response = requests.delete(url, headers=headers)
+        response = client.delete(url, headers=headers)
         
         # Check for successful deletion
         if response.status_code in [200, 204]:  
@@ -1,24 +1,21 @@
 import argparse
-import requests
+import csv
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-def get_access_token(region, tenantName, apiKey):
-    """
-    Generates an access token using the provided API key.
-    """
-    if region == "":
-        url = "https://iam.checkmarx.net/auth/realms/" + tenantName + "/protocol/openid-connect/token"
-    else:
-        url = "https://" + region + ".iam.checkmarx.net/auth/realms/" + tenantName + "/protocol/openid-connect/token"
-    payload = 'grant_type=refresh_token&client_id=ast-app&refresh_token=' + apiKey 
-    headers = {   'Content-Type': 'application/x-www-form-urlencoded'
-    }
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from cxone import auth, client, pagination, retry
+from cxone.configcache import DEFAULT_CONFIG_CACHE, ConfigCache, index_params
 
-    response = requests.request("POST", url, headers=headers, data=payload)
-
-    if response.status_code != 200:
-        raise Exception(f"Failed to get access token: {response.text}")
-        
-    return response.json().get("access_token")
+RESULT_FIELDS = ["row", "name", "action", "projectId", "status", "step", "error"]
+SYNC_FIELDS = ["row", "name", "projectId", "action", "changes", "status", "error"]
+REPOSITORY_KEY = "scan.handler.git.repository"
+BRANCH_KEY = "scan.handler.git.branch"
+# fields of a project that PUT /api/projects/{id} replaces; unchanged ones are sent back as they are
+PROJECT_PUT_FIELDS = ["name", "groups", "repoUrl", "mainBranch", "origin", "tags", "criticality"]
 
 def get_user_action():
     """
@@ -42,15 +39,14 @@ def get_user_activity():
             print("Invalid input. Please enter 'yes' or 'no'.")
     return active
 
-def update_url_and_branch(accessToken, region, projectId, repoUrl, mainBranch):
+def update_url_and_branch(accessToken, region, projectId, repoUrl, mainBranch, maxRetries=0, configCache=None):
     """
-    Updates the repository URL and main branch of an existing project.
+    Updates the repository URL and main branch of an existing project, and
+    drops the project from configCache so cached configurations (e.g.
+    AutomateScansScript's) do not keep the old repository.
     """
 
-    if region == "":
-        url = "https://ast.checkmarx.net/api/configuration/project"
-    else:
-        url = f"https://{region}.ast.checkmarx.net/api/configuration/project"
+    url = client.api_url(region, "/api/configuration/project")
     headers = {
     "Authorization": f"Bearer {accessToken}",
     "Accept": "application/json; version=1.0",
@@ -84,13 +80,80 @@ def update_url_and_branch(accessToken, region, projectId, repoUrl, mainBranch):
     
 
     # make the request to update the url and branch
-    response = requests.request("PATCH", url, headers=headers, params=params, json=payload)
+    response = retry.request_with_retry("PATCH", url, max_retries=maxRetries, headers=headers, params=params, json=payload)
     if response.status_code != 204:
         return False
     else:
+        if configCache is not None:
+            configCache.invalidate(region, projectId)
         return True
 
-def update_fields(accessToken, region):
+def project_headers(accessToken):
+    return {
+    "Authorization": f"Bearer {accessToken}",
+    "Accept": "application/json; version=1.0",
+    "Content-Type": "application/json; version=1.0"
+    }
+
+def put_project(accessToken, region, projectId, projectName, tags=None, groups=None, maxRetries=0):
+    """
+    Replaces the name (and, when given, the tags and groups) of an existing project.
+    """
+    url = client.api_url(region, f"/api/projects/{projectId}")
+    payload = {
+        "name": projectName,
+    }
+    if tags is not None:
+        payload["tags"] = tags
+    if groups is not None:
+        payload["groups"] = groups
+    return retry.request_with_retry("PUT", url, max_retries=maxRetries, headers=project_headers(accessToken), json=payload)
+
+def project_payload(current, changes):
+    """
+    PUT body for an existing project: its current PROJECT_PUT_FIELDS with changes applied.
+    """
+    payload = {key: current[key] for key in PROJECT_PUT_FIELDS if key in current}
+    payload.update(changes)
+    return payload
+
+def replace_project(accessToken, region, projectId, payload, maxRetries=0):
+    """
+    PUTs a full project body (see project_payload).
+    """
+    url = client.api_url(region, f"/api/projects/{projectId}")
+    return retry.request_with_retry("PUT", url, max_retries=maxRetries, headers=project_headers(accessToken), json=payload)
+
+def post_project(accessToken, region, projectName, repoUrl, mainBranch, tags=None, groups=None, maxRetries=0):
+    """
+    Creates a project.
+
+    POST is not idempotent, so it is only retried when the server says it did
+    not process the request: a 429, or a 503 with Retry-After. Other 5xx
+    responses and connection errors are returned/raised, since the project
+    may have been created anyway.
+    """
+    url = client.api_url(region, "/api/projects/")
+    payload = {
+        "name": projectName,
+        "repoUrl": repoUrl,
+        "mainBranch": mainBranch
+    }
+    if tags is not None:
+        payload["tags"] = tags
+    if groups is not None:
+        payload["groups"] = groups
+    for attempt in range(maxRetries + 1):
+        response = client.request("POST", url, headers=project_headers(accessToken), json=payload)
+        delay = retry.retry_after_seconds(response) if response.status_code in (429, 503) else None
+        if delay is None and response.status_code == 429:
+            delay = retry.backoff_delay(attempt)
+        if delay is None or attempt == maxRetries:
+            return response
+        time.sleep(min(delay, 60))
+    return response
+
+def update_fields(accessToken, region, configCache=None):
     """
     Updates fields in an existing project based on user input.
     """
@@ -103,27 +166,13 @@ def update_fields(accessToken, region):
     repoUrl = input("Repository URL: ")
     mainBranch = input("Main Branch: ")
 
-    # set up request components
-    if region == "":
-        url = f"https://ast.checkmarx.net/api/projects/{projectId}"
-    else:
-        url = f"https://{region}.ast.checkmarx.net/api/projects/{projectId}"
-    headers = {
-    "Authorization": f"Bearer {accessToken}",
-    "Accept": "application/json; version=1.0",
-    "Content-Type": "application/json; version=1.0"
-    }
-    payload = {
-        "name": projectName,
-    }
-
     # make the request to update the project
-    response = requests.request("PUT", url, headers=headers, json=payload)
+    response = put_project(accessToken, region, projectId, projectName)
     if response.status_code != 204:
         print(f"Failed to update project: {response.text}")
         print(f"Response status code: {response.status_code}")
     else:
-        if update_url_and_branch(accessToken, region, projectId, repoUrl, mainBranch):
+        if update_url_and_branch(accessToken, region, projectId, repoUrl, mainBranch, configCache=configCache):
             print(f"Project {projectName} updated successfully with ID: {projectId}")
             print("You can now run a scan on this project.")
         else:
@@ -133,7 +182,7 @@ def update_fields(accessToken, region):
     # get_project_configuration(accessToken, region, projectId)
     
 
-def create_project(accessToken, region):
+def create_project(accessToken, region, configCache=None):
     """
     Creates a new project based on user input.
     """
@@ -144,30 +193,14 @@ def create_project(accessToken, region):
     repoUrl = input("Repository URL: ")
     mainBranch = input("Main Branch: ")
 
-    # set up request components
-    if region == "":
-        url = "https://ast.checkmarx.net/api/projects/"
-    else:
-        url = f"https://{region}.ast.checkmarx.net/api/projects/"
-    headers = {
-    "Authorization": f"Bearer {accessToken}",
-    "Accept": "application/json; version=1.0",
-    "Content-Type": "application/json; version=1.0"
-    }
-    payload = {
-        "name": projectName,
-        "repoUrl": repoUrl,
-        "mainBranch": mainBranch
-    }
-
     # make the request to create the project
-    response = requests.request("POST", url, headers=headers, json=payload)
+    response = post_project(accessToken, region, projectName, repoUrl, mainBranch)
     if response.status_code != 201: 
         print(f"Failed to create project: {response.text}")
         print(f"Response status code: {response.status_code}")
     else:
         projectId = response.json().get("id")
-        if update_url_and_branch(accessToken, region, projectId, repoUrl, mainBranch):
+        if update_url_and_branch(accessToken, region, projectId, repoUrl, mainBranch, configCache=configCache):
             print(f"Project {projectName} created successfully with ID: {projectId}")
             print("You can now run a scan on this project.")
         else:
@@ -178,35 +211,379 @@ def get_project_configuration(accessToken, region, projectId):
     """
     Test method to look at project configuration data.
     """
-    if region == "":
-        url = "https://ast.checkmarx.net/api/configuration/project"
+    try:
+        configuration = fetch_project_configuration(accessToken, region, projectId)
+    except Exception as e:
+        print(e)
     else:
-        url = f"https://{region}.ast.checkmarx.net/api/configuration/project"
-    headers = {
-    "Authorization": f"Bearer {accessToken}",
-    "Accept": "application/json; version=1.0",
-    "Content-Type": "application/json; version=1.0"
-    }
+        print("Project configuration retrieved successfully.")
+        print("Configuration Data:", configuration)
+
+def fetch_project_configuration(accessToken, region, projectId, maxRetries=0):
+    """
+    Returns the configuration parameters of a project.
+    """
+    url = client.api_url(region, "/api/configuration/project")
     params = {
         "project-id" : projectId
     }
 
-    response = requests.request("GET", url, headers=headers, params=params)
+    response = retry.request_with_retry("GET", url, max_retries=maxRetries, headers=project_headers(accessToken), params=params)
     if response.status_code != 200:
-        print(f"Failed to retrieve project configuration: {response.text}")
-        print(f"Response status code: {response.status_code}")
+        raise Exception(f"Failed to retrieve project configuration: {response.status_code} {response.text}")
+    return response.json()
+
+def get_project(accessToken, region, projectId, maxRetries=0):
+    """
+    Returns a project, or None if it does not exist.
+    """
+    url = client.api_url(region, f"/api/projects/{projectId}")
+    response = retry.request_with_retry("GET", url, max_retries=maxRetries, headers=project_headers(accessToken))
+    if response.status_code == 404:
+        return None
+    if response.status_code != 200:
+        raise Exception(f"Failed to retrieve project {projectId}: {response.status_code} {response.text}")
+    return response.json()
+
+def find_projects_by_name(accessToken, region, names, maxRetries=0, chunkSize=50):
+    """
+    Returns {name: project} for the names that exist, using the server-side names filter.
+    """
+    url = client.api_url(region, "/api/projects/")
+    found = {}
+    for i in range(0, len(names), chunkSize):
+        params = {"names": ",".join(names[i:i + chunkSize])}
+        for project in pagination.fetch_all_pages(url, project_headers(accessToken), params, "projects", max_retries=maxRetries):
+            found[project["name"]] = project
+    return found
+
+def patch_configuration(accessToken, region, projectId, values, maxRetries=0):
+    """
+    Sets only the given configuration keys ({key: value}) of a project.
+    """
+    url = client.api_url(region, "/api/configuration/project")
+    params = {
+        "project-id" : projectId
+    }
+    payload = [{"key": key, "value": value} for key, value in values.items()]
+    response = retry.request_with_retry("PATCH", url, max_retries=maxRetries, headers=project_headers(accessToken), params=params, json=payload)
+    if response.status_code != 204:
+        raise Exception(f"Failed to update project configuration: {response.status_code} {response.text}")
+
+def parse_tags(value):
+    """
+    Tags from a manifest: a mapping (YAML) or "key:value;key2" / "key=value" text (CSV).
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, dict):
+        return {str(k): "" if v is None else str(v) for k, v in value.items()}
+    tags = {}
+    for item in str(value).split(";"):
+        item = item.strip()
+        if not item:
+            continue
+        for separator in (":", "="):
+            if separator in item:
+                key, tagValue = item.split(separator, 1)
+                tags[key.strip()] = tagValue.strip()
+                break
+        else:
+            tags[item] = ""
+    return tags
+
+def parse_groups(value):
+    """
+    Group IDs from a manifest: a list (YAML) or "id1;id2" text (CSV).
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (list, tuple)):
+        return [str(group) for group in value]
+    return [group.strip() for group in str(value).split(";") if group.strip()]
+
+def read_manifest(path):
+    """
+    Reads a CSV or YAML (.yml/.yaml) manifest into a list of project dicts with
+    keys name, repoUrl, branch, tags, groups and projectId (rows with a
+    projectId update that project, the others create one).
+    """
+    if path.lower().endswith((".yml", ".yaml")):
+        try:
+            import yaml
+        except ImportError:
+            raise Exception("YAML manifests require PyYAML: pip install pyyaml")
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or []
+        rows = data.get("projects", []) if isinstance(data, dict) else data
     else:
-        print("Project configuration retrieved successfully.")
-        print("Configuration Data:", response.json())
+        with open(path, "r", newline="", encoding="utf-8-sig") as f:
+            rows = list(csv.DictReader(f))
 
+    projects = []
+    for row in rows:
+        # accept both the CSV-style snake_case headers and the API's camelCase names
+        get = lambda *keys: next((row[k] for k in keys if row.get(k) not in (None, "")), None)
+        projects.append({
+            "name": get("name", "project_name", "projectName"),
+            "repoUrl": get("repo_url", "repoUrl", "repository"),
+            "branch": get("branch", "main_branch", "mainBranch"),
+            "tags": parse_tags(get("tags")),
+            "groups": parse_groups(get("groups")),
+            "projectId": get("project_id", "projectId", "id")
+        })
+    return projects
 
+def provision_project(region, tokenProvider, index, project, maxRetries=5):
+    """
+    First step for one manifest row: create the project, or update the name,
+    repository, tags and groups of rows with a projectId (keeping every field
+    the row leaves empty). Returns the result dict for the row.
+    """
+    result = {"row": index, "name": project["name"], "action": "update" if project["projectId"] else "create",
+              "projectId": project["projectId"], "status": "failed", "step": "project", "error": None}
+    if not project["name"] or not project["repoUrl"] or not project["branch"]:
+        result["error"] = "name, repo URL and branch are required"
+        return result
+    try:
+        if project["projectId"]:
+            # PUT replaces the whole project: start from what it has so empty manifest columns keep their values
+            current = get_project(tokenProvider.get_token(), region, project["projectId"], maxRetries)
+            if current is None:
+                raise Exception(f"Project {project['projectId']} not found")
+            changes = {"name": project["name"], "repoUrl": project["repoUrl"], "mainBranch": project["branch"]}
+            if project["tags"] is not None:
+                changes["tags"] = project["tags"]
+            if project["groups"] is not None:
+                changes["groups"] = project["groups"]
+            response = replace_project(tokenProvider.get_token(), region, project["projectId"], project_payload(current, changes), maxRetries)
+            ok = response.status_code == 204
+        else:
+            try:
+                response = post_project(tokenProvider.get_token(), region, project["name"], project["repoUrl"], project["branch"],
+                                        project["tags"], project["groups"], maxRetries)
+            except Exception as e:
+                response, error = None, e
+            ok = response is not None and response.status_code == 201
+            if ok:
+                result["projectId"] = response.json().get("id")
+            elif response is None or response.status_code >= 500:
+                # the request may have created the project before failing: look it up instead of guessing
+                existing = find_projects_by_name(tokenProvider.get_token(), region, [project["name"]], maxRetries).get(project["name"])
+                if existing is not None:
+                    result["projectId"] = existing["id"]
+                    ok = True
+                elif response is None:
+                    raise error
+        if not ok:
+            result["error"] = f"{response.status_code} {response.text}"
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+def configure_repository(region, tokenProvider, project, result, maxRetries=5, configCache=None):
+    """
+    Second step for one manifest row: set the repository URL and branch.
+    """
+    if result["error"] is not None:
+        return result
+    result["step"] = "repository"
+    try:
+        if update_url_and_branch(tokenProvider.get_token(), region, result["projectId"], project["repoUrl"], project["branch"], maxRetries,
+                                 configCache):
+            result["status"] = "ok"
+            result["step"] = None
+        else:
+            result["error"] = "failed to update repository URL and branch"
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+def provision_manifest(region, tokenProvider, projects, workers=8, pipeline=False, maxRetries=5, onResult=None, configCache=None):
+    """
+    Creates/updates every manifest project on a bounded worker pool.
+
+    By default each worker makes both calls of a row back to back. With
+    pipeline=True the repository PATCH runs on a second pool of the same
+    size, so project workers move on to the next row as soon as their first
+    call returns. onResult(result) is called as each row finishes. Returns the results in row order.
+    """
+    client.configure(pool_size=max(workers * (2 if pipeline else 1), client.DEFAULT_POOL_SIZE))
+    results = [None] * len(projects)
+    lock = threading.Lock()
+
+    def finish(result):
+        with lock:
+            results[result["row"] - 1] = result
+            if onResult is not None:
+                onResult(result)
+
+    def both_steps(index, project):
+        result = provision_project(region, tokenProvider, index, project, maxRetries)
+        finish(configure_repository(region, tokenProvider, project, result, maxRetries, configCache))
+
+    if not pipeline:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(both_steps, i, project) for i, project in enumerate(projects, start=1)]:
+                future.result()
+        return results
+
+    with ThreadPoolExecutor(max_workers=workers) as repositoryExecutor:
+        def first_step(index, project):
+            result = provision_project(region, tokenProvider, index, project, maxRetries)
+            if result["error"] is not None:
+                finish(result)
+            else:
+                repositoryExecutor.submit(lambda: finish(configure_repository(region, tokenProvider, project, result, maxRetries, configCache)))
+
+        with ThreadPoolExecutor(max_workers=workers) as projectExecutor:
+            for future in [projectExecutor.submit(first_step, i, project) for i, project in enumerate(projects, start=1)]:
+                future.result()
+    return results
+
+def write_results(results, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+
+def diff_project(current, desired, exact=False):
+    """
+    Compares a project with its manifest row. Tags and groups are merged into
+    the existing ones unless exact=True. Returns (PUT payload or None, changes).
+    """
+    changes = []
+    wanted = {}
+    if desired["name"] and desired["name"] != current.get("name"):
+        wanted["name"] = desired["name"]
+    if desired["tags"] is not None:
+        currentTags = current.get("tags") or {}
+        tags = dict(desired["tags"]) if exact else dict(currentTags, **desired["tags"])
+        if tags != currentTags:
+            wanted["tags"] = tags
+    if desired["groups"] is not None:
+        currentGroups = current.get("groups") or []
+        groups = list(desired["groups"]) if exact else currentGroups + [g for g in desired["groups"] if g not in currentGroups]
+        if sorted(groups) != sorted(currentGroups):
+            wanted["groups"] = groups
+
+    for key, value in wanted.items():
+        changes.append(f"{key}: {current.get(key)!r} -> {value!r}")
+    if not wanted:
+        return None, changes
+    return project_payload(current, wanted), changes
+
+def diff_configuration(configuration, desired):
+    """
+    Returns ({key: value} of configuration keys to PATCH, changes).
+    """
+    current = {key: param.get("value") for key, param in index_params(configuration).items()}
+    patch = {}
+    for key, value in ((REPOSITORY_KEY, desired["repoUrl"]), (BRANCH_KEY, desired["branch"])):
+        if value is not None and (current.get(key) or "").strip() != value.strip():
+            patch[key] = value
+    return patch, [f"{key}: {current.get(key)!r} -> {value!r}" for key, value in patch.items()]
+
+def sync_manifest(region, tokenProvider, projects, workers=8, dryRun=False, exact=False, maxRetries=5, configCache=None):
+    """
+    Brings every project in the manifest to its desired state, sending only what differs.
+
+    Projects and their configuration are prefetched concurrently, each row is
+    diffed, and only changed project fields (PUT) and configuration keys
+    (PATCH) are written. Rows already in sync cost no writes; rows without a
+    projectId whose name does not exist yet are created. With dryRun=True nothing is written
+    and the results describe what would change. A configCache (use ttl=0)
+    turns the configuration prefetch into conditional requests.
+    """
+    client.configure(pool_size=max(workers, client.DEFAULT_POOL_SIZE))
+    token = tokenProvider.get_token()
+    byName = find_projects_by_name(token, region, [p["name"] for p in projects if not p["projectId"] and p["name"]], maxRetries)
+
+    def prefetch(project):
+        projectId = project["projectId"] or (byName.get(project["name"]) or {}).get("id")
+        if not projectId:
+            return None, None
+        current = get_project(tokenProvider.get_token(), region, projectId, maxRetries)
+        if current is None:
+            return None, None
+        if configCache is not None:
+            return current, configCache.get(region, tokenProvider.get_token(), projectId, maxRetries).params
+        return current, fetch_project_configuration(tokenProvider.get_token(), region, projectId, maxRetries)
+
+    def sync(index, project):
+        result = {"row": index, "name": project["name"], "projectId": project["projectId"], "action": None,
+                  "changes": "", "status": "ok", "error": None}
+        try:
+            current, configuration = prefetch(project)
+            if current is None and project["projectId"]:
+                raise Exception(f"Project {project['projectId']} not found")
+            if current is None:
+                result["action"] = "create"
+                result["changes"] = f"create project {project['name']!r}"
+                if not dryRun:
+                    created = configure_repository(region, tokenProvider, project,
+                                                   provision_project(region, tokenProvider, index, project, maxRetries), maxRetries,
+                                                   configCache)
+                    result.update(projectId=created["projectId"], status=created["status"], error=created["error"])
+                return result
+
+            result["projectId"] = current["id"]
+            payload, projectChanges = diff_project(current, project, exact)
+            patch, configChanges = diff_configuration(configuration, project)
+            result["changes"] = "; ".join(projectChanges + configChanges)
+            result["action"] = "update" if payload or patch else "in-sync"
+            if dryRun:
+                return result
+            if payload:
+                response = replace_project(tokenProvider.get_token(), region, current["id"], payload, maxRetries)
+                if response.status_code != 204:
+                    raise Exception(f"Failed to update project: {response.status_code} {response.text}")
+            if patch:
+                patch_configuration(tokenProvider.get_token(), region, current["id"], patch, maxRetries)
+                if configCache is not None:
+                    configCache.invalidate(region, current["id"])
+        except Exception as e:
+            result["status"] = "failed"
+            result["error"] = str(e)
+        return result
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda item: sync(*item), enumerate(projects, start=1)))
+
+def print_sync_report(results, dryRun=False):
+    counts = {}
+    for result in results:
+        key = "failed" if result["status"] != "ok" else result["action"]
+        counts[key] = counts.get(key, 0) + 1
+    prefix = "to be " if dryRun else ""
+    print(f"{len(results)} projects: {counts.get('in-sync', 0)} already in sync, {counts.get('update', 0)} {prefix}updated, "
+          f"{counts.get('create', 0)} {prefix}created, {counts.get('failed', 0)} failed.")
+    for result in results:
+        if result["status"] != "ok":
+            print(f"  FAILED {result['name']}: {result['error']}")
+        elif result["action"] != "in-sync":
+            print(f"  {result['action']} {result['name']}: {result['changes']}")
+
+def write_sync_report(results, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=SYNC_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
 
 def main():
     # Obtain command line arguments
-    parser = argparse.ArgumentParser(description='Export a CxOne scan workflow as a CSV file')
+    parser = argparse.ArgumentParser(description='Create or update CxOne projects interactively, or in bulk from a manifest')
     parser.add_argument('--region', required=True, help='Region for the API endpoint (e.g., us, eu)')
     parser.add_argument('--tenant_name', required=True, help='Tenant name')
     parser.add_argument('--api_key', required=True, help='API key for authentication')
+    parser.add_argument('--manifest', help='CSV or YAML manifest of projects to create/update without prompting')
+    parser.add_argument('--workers', type=int, default=8, help='With --manifest, number of projects processed concurrently')
+    parser.add_argument('--pipeline', action='store_true', help='With --manifest, run the repository update on its own worker pool')
+    parser.add_argument('--max_retries', type=int, default=5, help='With --manifest, retries for 429/5xx responses')
+    parser.add_argument('--results', help='With --manifest, per-row result CSV (default: <manifest>.results.csv)')
+    parser.add_argument('--sync', action='store_true', help='With --manifest, only write what differs from the current projects')
+    parser.add_argument('--dry_run', action='store_true', help='With --sync, report the differences without writing anything')
+    parser.add_argument('--exact', action='store_true', help='With --sync, replace tags and groups instead of adding to them')
 
     # Set up various global variables
     args = parser.parse_args()
@@ -214,15 +591,44 @@ def main():
     tenantName = args.tenant_name
     apiKey = args.api_key
 
+    if args.manifest:
+        projects = read_manifest(args.manifest)
+        tokenProvider = auth.get_provider(client.iam_base_url(region), tenantName, apiKey)
+        if args.sync:
+            # ttl=0: every configuration is revalidated, so the diff never works from stale data
+            configCache = ConfigCache(DEFAULT_CONFIG_CACHE, ttl=0)
+            try:
+                results = sync_manifest(region, tokenProvider, projects, args.workers, args.dry_run, args.exact, args.max_retries, configCache)
+            finally:
+                configCache.save()
+            resultsPath = args.results or os.path.splitext(args.manifest)[0] + (".dry_run.csv" if args.dry_run else ".sync.csv")
+            write_sync_report(results, resultsPath)
+            print_sync_report(results, args.dry_run)
+            print(f"Report written to {resultsPath}")
+            return
+        configCache = ConfigCache(DEFAULT_CONFIG_CACHE)
+        try:
+            results = provision_manifest(region, tokenProvider, projects, args.workers, args.pipeline, args.max_retries,
+                                         configCache=configCache)
+        finally:
+            configCache.save()
+        resultsPath = args.results or os.path.splitext(args.manifest)[0] + ".results.csv"
+        write_results(results, resultsPath)
+        failed = [r for r in results if r["status"] != "ok"]
+        print(f"Processed {len(results)} projects: {len(results) - len(failed)} succeeded, {len(failed)} failed. Results written to {resultsPath}")
+        return
+
     # Determine is user wants to update fields or create new project
-    accessToken = get_access_token(region, tenantName, apiKey)
+    accessToken = auth.get_access_token(region, tenantName, apiKey)
     active = "yes"
     while active == "yes":
         action = get_user_action()
+        configCache = ConfigCache(DEFAULT_CONFIG_CACHE)
         if action == "update":
-            update_fields(accessToken, region)
+            update_fields(accessToken, region, configCache)
         elif action == "create":
-            create_project(accessToken, region)
+            create_project(accessToken, region, configCache)
+        configCache.save()
         active = get_user_activity()
 
 
@@ -1,38 +1,39 @@
-import requests
 import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from cxone import auth, client, pagination, retry
+from cxone.ratelimit import RateLimiter
+from cxone.scans import TERMINAL_SCAN_STATUSES, ScanTracker
+
+TRIAGE_ENGINES = ("sast", "kics", "sca")
+BISECT_STATUSES = (400, 404, 422)  # item rejections worth splitting a batch to isolate
+_DOTTED_VERSION_START = re.compile(r"-(?=v?\d+\.\d)")
+_VERSION_START = re.compile(r"-(?=v?\d)")
+# SCA risk states for the SAST/KICS predicate states
+SCA_STATES = {
+    "TO_VERIFY": "ToVerify",
+    "NOT_EXPLOITABLE": "NotExploitable",
+    "PROPOSED_NOT_EXPLOITABLE": "ProposedNotExploitable",
+    "CONFIRMED": "Confirmed",
+    "URGENT": "Urgent"
+}
 
 scanId = None
 engines = None
 projectId = None
-def get_access_token(region, tenantName, apiKey):
+def get_latest_scan(accessToken, region, projectName, statuses=None):
     """
-    Generates an access token using the provided API key.
-    """
-    if region == "":
-        url = "https://iam.checkmarx.net/auth/realms/" + tenantName + "/protocol/openid-connect/token"
-    else:
-        url = "https://" + region + ".iam.checkmarx.net/auth/realms/" + tenantName + "/protocol/openid-connect/token"
-    payload = 'grant_type=refresh_token&client_id=ast-app&refresh_token=' + apiKey 
-    headers = {   'Content-Type': 'application/x-www-form-urlencoded'
-    }
-
-    response = requests.request("POST", url, headers=headers, data=payload)
-
-    if response.status_code != 200:
-        raise Exception(f"Failed to get access token: {response.text}")
-        
-    return response.json().get("access_token")
-
-def get_most_recent_scan(accessToken, region, projectName):
-    """
-    Grabs the most recent scan for a given project.
+    Returns the most recent scan of a project (optionally only scans with one of
+    the given statuses), or None.
     """
 
     # set up request for scan list
-    if region == "":
-        url = "https://ast.checkmarx.net/api/scans/"
-    else:
-        url = f"https://{region}.ast.checkmarx.net/api/scans/"
+    url = client.api_url(region, "/api/scans/")
     headers = {
         "Authorization": f"Bearer {accessToken}",
         "Accept": "application/json; version=1.0",
@@ -42,69 +43,129 @@ def get_most_recent_scan(accessToken, region, projectName):
         "field" : ["project-names"],
         "project-names" : [projectName]
     }
+    if statuses:
+        params["statuses"] = list(statuses)
 
-    response = requests.request("GET", url, headers=headers, params=params)
+    response = client.request("GET", url, headers=headers, params=params)
 
     #print(response.text)
 
     if response.status_code != 200:
         print(f"Failed to get scans: {response.text}")
         return None
-    else:
-        global scanId
-        scanId = response.json()["scans"][0]["id"]
-        scanEngines = response.json()["scans"][0]["engines"]
-        project_id = response.json()["scans"][0]["projectId"]
-        return scanId, project_id, scanEngines
+    scans = response.json().get("scans") or []
+    return scans[0] if scans else None
 
-def get_iac_similarity_ids(region, access_token, scan_id):
-    if region == "":
-        url = f"https://ast.checkmarx.net/api/kics-results/"
-    else:
-        url = f"https://{region}.ast.checkmarx.net/api/kics-results/"
-    headers = {
+def get_most_recent_scan(accessToken, region, projectName):
+    """
+    Grabs the most recent completed scan for a given project.
+    """
+    scan = get_latest_scan(accessToken, region, projectName, statuses=["Completed"])
+    if scan is None:
+        print(f"No completed scan found for project {projectName}")
+        return None
+    global scanId
+    scanId = scan["id"]
+    return scanId, scan["projectId"], scan["engines"]
+
+def wait_for_latest_scan(region, tokenProvider, projectName, timeout=None):
+    """
+    Waits for the latest scan of a project (whatever its status when called)
+    to finish. Returns (scanId, projectId, engines), or None if it did not
+    complete successfully.
+    """
+    scan = get_latest_scan(tokenProvider.get_token(), region, projectName)
+    if scan is None:
+        print(f"No scan found for project {projectName}")
+        return None
+    status = scan.get("status")
+    if status not in TERMINAL_SCAN_STATUSES:
+        print(f"Waiting for scan {scan['id']} ({status}) to finish")
+        tracker = ScanTracker(region, tokenProvider)
+        tracker.add(scan["id"])
+        status = tracker.wait(timeout).get(scan["id"], status)
+    if status not in ("Completed", "Partial"):
+        print(f"Scan {scan['id']} did not complete: {status}")
+        return None
+    global scanId
+    scanId = scan["id"]
+    return scanId, scan["projectId"], scan["engines"]
+
+def results_headers(access_token):
+    """
+    Headers for the results endpoints. access_token may also be a token
+    provider, which is then asked again for every page.
+    """
+    if hasattr(access_token, "get_token"):
+        return lambda: results_headers(access_token.get_token())
+    return {
         'Authorization': f'Bearer {access_token}',
         'Accept': 'application/json'
     }
+
+def iter_iac_results(region, access_token, scan_id, page_size=pagination.DEFAULT_PAGE_SIZE, prefetch=True):
+    """
+    Lazily yields every KICS (IaC) result of a scan, page by page.
+    """
+    url = client.api_url(region, "/api/kics-results/")
+    headers = results_headers(access_token)
+    params = {
+        "scan-id": scan_id
+    }
+    return pagination.iter_items(url, headers, params, "results", page_size, prefetch)
+
+def iter_sast_results(region, access_token, scan_id, page_size=pagination.DEFAULT_PAGE_SIZE, prefetch=True):
+    """
+    Lazily yields every SAST result of a scan, page by page.
+    """
+    url = client.api_url(region, "/api/sast-results/")
+    headers = results_headers(access_token)
     params = {
         "scan-id": scan_id
     }
-    response = requests.request("GET", url, params=params, headers=headers)
-    data = response.json()
-    results = data.get("results", [])
-    if(results!= []):
-        similarity_ids = [r["similarityId"] for r in results if "similarityId" in r]
-        print(similarity_ids)
+    return pagination.iter_items(url, headers, params, "results", page_size, prefetch)
+
+def get_iac_similarity_ids(region, access_token, scan_id):
+    similarity_ids = [r["similarityId"] for r in iter_iac_results(region, access_token, scan_id) if "similarityId" in r]
+    if similarity_ids:
+        print(f"Found {len(similarity_ids)} KICS similarity IDs.")
         return similarity_ids
 
 
 def get_sast_similarity_ids(region, access_token, scan_id):
-    if region == "":
-        url = f"https://ast.checkmarx.net/api/sast-results/"
-    else:
-        url = f"https://{region}.ast.checkmarx.net/api/sast-results/"
+    similarity_ids = [r["similarityID"] for r in iter_sast_results(region, access_token, scan_id) if "similarityID" in r]
+    if similarity_ids:
+        print(f"Found {len(similarity_ids)} SAST similarity IDs.")
+        return similarity_ids
+
+def change_sast_predicate(region, access_token, project_id, similarity_id, severity, state, scan_id, rate_limiter=None, max_retries=0):
+    return change_sast_predicates(region, access_token, project_id, [similarity_id], severity, state, scan_id, rate_limiter, max_retries)
+
+def change_sast_predicates(region, access_token, project_id, similarity_ids, severity, state, scan_id, rate_limiter=None, max_retries=0):
+    """
+    Sets the same predicate on several similarity IDs in one request.
+    """
+    url = client.api_url(region, "/api/sast-results-predicates/")
     headers = {
         'Authorization': f'Bearer {access_token}',
-        'Accept': 'application/json'
-
-    }
-    params = {
-        "scan-id": scan_id
+        'Accept': '*/*; version=1.0',
+        'Content-Type': 'application/json'
     }
-    response = requests.request("GET", url, params=params, headers=headers)
-    data = response.json()
-    #print(data)
-    results = data.get("results", [])
-    if(results != [] and results != None):
-        similarity_ids = [r["similarityID"] for r in results if "similarityID" in r]
-        print(similarity_ids)
-        return similarity_ids
+    payload = [{
+        "similarityId": similarity_id,
+        "projectId": project_id,
+        "severity": severity,
+        "state": state,
+        "comment": "changed"
+        } for similarity_id in similarity_ids]
+    response = retry.request_with_retry("POST", url, max_retries=max_retries, rate_limiter=rate_limiter, json=payload, headers=headers)
+    return response
 
-def change_sast_predicate(region, access_token, project_id, similarity_id, severity, state, scan_id):
-    if region == "":
-        url = "https://ast.checkmarx.net/api/sast-results-predicates/"
-    else:
-        url = f"https://{region}.ast.checkmarx.net/api/sast-results-predicates/"
+def change_kics_predicates(region, access_token, project_id, similarity_ids, severity, state, scan_id, rate_limiter=None, max_retries=0):
+    """
+    Sets the same predicate on several KICS (IaC) similarity IDs in one request.
+    """
+    url = client.api_url(region, "/api/kics-results-predicates")
     headers = {
         'Authorization': f'Bearer {access_token}',
         'Accept': '*/*; version=1.0',
@@ -116,9 +177,250 @@ def change_sast_predicate(region, access_token, project_id, similarity_id, sever
         "severity": severity,
         "state": state,
         "comment": "changed"
-        }]
-    response = requests.post(url, json=payload, headers=headers)
-    return response
+        } for similarity_id in similarity_ids]
+    return retry.request_with_retry("POST", url, max_retries=max_retries, rate_limiter=rate_limiter, json=payload, headers=headers)
+
+def change_sca_state(region, access_token, project_id, target, state, rate_limiter=None, max_retries=0):
+    """
+    Changes the state of one SCA vulnerability in one package through the SCA
+    risk management endpoint (one finding per request; SCA has no severity predicate).
+    """
+    url = client.api_url(region, "/api/sca/management-of-risk")
+    headers = {
+        'Authorization': f'Bearer {access_token}',
+        'Accept': '*/*; version=1.0',
+        'Content-Type': 'application/json'
+    }
+    payload = dict(target, projectIds=[project_id], actionType="ChangeState", value=SCA_STATES.get(state, state), comment="changed")
+    return retry.request_with_retry("POST", url, max_retries=max_retries, rate_limiter=rate_limiter, json=payload, headers=headers)
+
+def change_predicates(engine, region, access_token, project_id, targets, severity, state, scan_id, rate_limiter=None, max_retries=0):
+    """
+    Sends one predicate request to the engine's own endpoint.
+    """
+    if engine == "sast":
+        return change_sast_predicates(region, access_token, project_id, targets, severity, state, scan_id, rate_limiter, max_retries)
+    if engine == "kics":
+        return change_kics_predicates(region, access_token, project_id, targets, severity, state, scan_id, rate_limiter, max_retries)
+    if engine == "sca":
+        return change_sca_state(region, access_token, project_id, targets[0], state, rate_limiter, max_retries)
+    raise Exception(f"Triage is not supported for the {engine} engine")
+
+def iter_sca_results(region, access_token, scan_id, page_size=pagination.DEFAULT_PAGE_SIZE, prefetch=True):
+    """
+    Lazily yields every SCA result of a scan (from the combined results endpoint).
+    """
+    url = client.api_url(region, "/api/results/")
+    headers = results_headers(access_token)
+    params = {
+        "scan-id": scan_id
+    }
+    return (r for r in pagination.iter_items(url, headers, params, "results", page_size, prefetch) if r.get("type") == "sca")
+
+def split_package_identifier(identifier):
+    """
+    Splits an SCA packageIdentifier ("Manager-name-version") into its parts.
+    Names and versions may both contain "-", so the version is taken to start
+    at the first "-" followed by a dotted version number (or, failing that,
+    at the last "-" followed by a digit). Returns None if there is no version.
+
+    >>> split_package_identifier("Npm-lodash-4.17.15")
+    ('Npm', 'lodash', '4.17.15')
+    >>> split_package_identifier("Npm-@babel/core-7.0.0-beta.1")
+    ('Npm', '@babel/core', '7.0.0-beta.1')
+    >>> split_package_identifier("Npm-left-pad-1.3.0")
+    ('Npm', 'left-pad', '1.3.0')
+    >>> split_package_identifier("Python-py-2to3-1.0")
+    ('Python', 'py-2to3', '1.0')
+    >>> split_package_identifier("Npm-nodash") is None
+    True
+    """
+    manager, _, rest = identifier.partition("-")
+    match = _DOTTED_VERSION_START.search(rest)
+    if match is None:
+        matches = list(_VERSION_START.finditer(rest))
+        match = matches[-1] if matches else None
+    if match is None or not manager or match.start() == 0:
+        return None
+    return manager, rest[:match.start()], rest[match.end():]
+
+def sca_target(result):
+    """
+    What the SCA risk endpoint identifies a finding by. Uses the package name and
+    version fields when the result has them, else parses packageIdentifier.
+    """
+    data = result.get("data") or {}
+    manager, name, version = data.get("packageManager"), data.get("packageName"), data.get("packageVersion")
+    if not (manager and name and version):
+        parts = split_package_identifier(data.get("packageIdentifier") or "")
+        if parts is None:
+            return None
+        manager, name, version = parts
+    vulnerability = (result.get("vulnerabilityDetails") or {}).get("cveName") or result.get("id")
+    if not vulnerability:
+        return None
+    return {"packageManager": manager, "packageName": name, "packageVersion": version, "vulnerabilityId": vulnerability}
+
+def iter_triage_targets(engine, region, access_token, scan_id):
+    """
+    Yields the findings of one engine in the form its predicate endpoint
+    expects. Pass a token provider as access_token for long runs.
+    """
+    if engine == "sast":
+        # similarity IDs are sent as-is; stripping "-" causes 404s on negative sim ids
+        return (str(r["similarityID"]) for r in iter_sast_results(region, access_token, scan_id) if "similarityID" in r)
+    if engine == "kics":
+        return (str(r["similarityId"]) for r in iter_iac_results(region, access_token, scan_id) if "similarityId" in r)
+    if engine == "sca":
+        return (t for t in (sca_target(r) for r in iter_sca_results(region, access_token, scan_id)) if t is not None)
+    raise Exception(f"Triage is not supported for the {engine} engine")
+
+def target_label(target):
+    if isinstance(target, dict):
+        return f"{target['packageName']}@{target['packageVersion']} {target['vulnerabilityId']}"
+    return target
+
+def submit_predicate_batch(region, token_provider, project_id, scan_id, similarity_ids, severity, state, rate_limiter=None, max_retries=0,
+                           engine="sast"):
+    """
+    Posts one batch of predicates. If the batch is rejected as invalid
+    (400/404/422) it is split in half and each half resubmitted, so a single
+    bad ID only fails itself. Throttling, server errors left over after
+    retrying and connection errors fail the whole batch instead.
+
+    Returns (per-ID results, number of requests sent).
+    """
+    try:
+        # ask the provider each time so long runs pick up refreshed tokens
+        response = change_predicates(engine, region, token_provider.get_token(), project_id, similarity_ids, severity, state, scan_id, rate_limiter, max_retries)
+        status = response.status_code
+        # successful response seems to be 201 and not 204, needs investigation
+        error = None if status in (200, 201, 204) else response.text
+    except Exception as e:
+        status, error = None, str(e)
+
+    if error is None or len(similarity_ids) == 1 or status not in BISECT_STATUSES:
+        return [{"engine": engine, "similarityId": target_label(similarity_id), "status": status, "error": error}
+                for similarity_id in similarity_ids], 1
+
+    middle = len(similarity_ids) // 2
+    first_results, first_requests = submit_predicate_batch(region, token_provider, project_id, scan_id, similarity_ids[:middle], severity, state, rate_limiter, max_retries, engine)
+    second_results, second_requests = submit_predicate_batch(region, token_provider, project_id, scan_id, similarity_ids[middle:], severity, state, rate_limiter, max_retries, engine)
+    return first_results + second_results, 1 + first_requests + second_requests
+
+def summarize_triage(results, request_count, elapsed):
+    failed = [r for r in results if r["error"] is not None]
+    return {
+        "results": results,
+        "total": len(results),
+        "succeeded": len(results) - len(failed),
+        "failed": failed,
+        "requests": request_count,
+        "elapsed": elapsed,
+        "throughput": len(results) / elapsed if elapsed > 0 else 0.0
+    }
+
+def triage_results(engine, region, token_provider, project_id, scan_id, targets, severity, state, workers=8, rate_limiter=None,
+                   max_retries=5, batch_size=1):
+    """
+    Updates the predicate of every target of one engine through a bounded
+    thread pool. targets can be a lazy iterator: batches are submitted as soon
+    as they fill up, so updates start while later result pages are still
+    being fetched, and reading pauses while 2 * workers batches are pending.
+    Returns a summary dict; if reading the targets failed part way, it also
+    has an "error" and covers the targets read until then.
+    """
+    # the SCA endpoint takes one finding per request
+    batch_size = 1 if engine == "sca" else max(1, batch_size)
+
+    results = []
+    request_count = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = set()
+
+        def collect(done):
+            nonlocal request_count
+            for future in done:
+                batch_results, batch_requests = future.result()
+                results.extend(batch_results)
+                request_count += batch_requests
+
+        def submit(batch):
+            # at most two batches per worker are queued, so targets are only read as fast as they are posted
+            if len(futures) >= 2 * workers:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                futures.difference_update(done)
+                collect(done)
+            futures.add(executor.submit(submit_predicate_batch, region, token_provider, project_id, scan_id, batch, severity, state,
+                                        rate_limiter, max_retries, engine))
+
+        batch = []
+        error = None
+        try:
+            for target in targets:
+                batch.append(target)
+                if len(batch) >= batch_size:
+                    submit(batch)
+                    batch = []
+        except Exception as e:
+            # e.g. a results page could not be fetched: still post and report what was read
+            error = e
+        if batch:
+            submit(batch)
+        collect(as_completed(futures))
+    summary = summarize_triage(results, request_count, time.perf_counter() - start)
+    if error is not None:
+        summary["error"] = str(error)
+    return summary
+
+def triage_scan(region, token_provider, project_id, scan_id, engines, severity, state, workers=8, rate_limit=0, max_retries=5, batch_size=1):
+    """
+    Triages every supported engine of a scan at once. Each engine fetches its
+    results and posts to its own predicate endpoint on its own worker pool;
+    all of them share one rate limiter. Returns a merged summary with a
+    per-engine breakdown under "engines".
+    """
+    engines = [engine for engine in engines if engine in TRIAGE_ENGINES]
+    rate_limiter = RateLimiter(rate_limit)
+    client.configure(pool_size=max(workers * max(1, len(engines)), client.DEFAULT_POOL_SIZE))
+
+    def run_engine(engine):
+        targets = iter_triage_targets(engine, region, token_provider, scan_id)
+        return triage_results(engine, region, token_provider, project_id, scan_id, targets, severity, state, workers, rate_limiter,
+                              max_retries, batch_size)
+
+    per_engine = {}
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, len(engines))) as executor:
+        futures = {executor.submit(run_engine, engine): engine for engine in engines}
+        for future in as_completed(futures):
+            try:
+                per_engine[futures[future]] = future.result()
+            except Exception as e:
+                # e.g. the results of one engine could not be fetched; the others still count
+                per_engine[futures[future]] = {"error": str(e)}
+
+    results = [r for summary in per_engine.values() for r in summary.get("results", [])]
+    merged = summarize_triage(results, sum(summary.get("requests", 0) for summary in per_engine.values()), time.perf_counter() - start)
+    merged["engines"] = per_engine
+    return merged
+
+def print_triage_summary(summary, max_errors=20):
+    print(f"Triaged {summary['total']} findings in {summary['elapsed']:.1f}s with {summary['requests']} requests "
+          f"({summary['throughput']:.1f} findings/s): {summary['succeeded']} updated, {len(summary['failed'])} failed.")
+    for engine, engine_summary in sorted(summary.get("engines", {}).items()):
+        if "total" not in engine_summary:
+            print(f"  {engine}: not triaged: {engine_summary['error']}")
+            continue
+        print(f"  {engine}: {engine_summary['total']} findings, {engine_summary['succeeded']} updated, "
+              f"{len(engine_summary['failed'])} failed ({engine_summary['elapsed']:.1f}s)")
+        if "error" in engine_summary:
+            print(f"  {engine}: stopped early, remaining findings not triaged: {engine_summary['error']}")
+    for result in summary["failed"][:max_errors]:
+        print(f"  {result.get('engine', 'sast')} {result['similarityId']}: {result['status']} {result['error']}")
+    if len(summary["failed"]) > max_errors:
+        print(f"  ... and {len(summary['failed']) - max_errors} more failures")
 
 
 def main():
@@ -128,6 +430,15 @@ def main():
     parser.add_argument('--tenant_name', required=True, help='Tenant name')
     parser.add_argument('--api_key', required=True, help='API key for authentication')
     parser.add_argument('--project_name', required=True, help='Project name')
+    parser.add_argument('--workers', type=int, default=8, help='Number of concurrent predicate updates')
+    parser.add_argument('--rate_limit', type=float, default=0, help='Max requests per second per host (0 = unlimited)')
+    parser.add_argument('--max_retries', type=int, default=5, help='Retries for 429/5xx responses')
+    parser.add_argument('--batch_size', type=int, default=1, help='Similarity IDs sent per predicate request')
+    parser.add_argument('--engines', nargs='+', choices=TRIAGE_ENGINES, help='Only triage these engines (default: every supported engine in the scan)')
+    parser.add_argument('--severity', default='LOW', help='Severity to set on SAST/KICS findings (default: LOW)')
+    parser.add_argument('--state', default='NOT_EXPLOITABLE', help='State to set on every finding (default: NOT_EXPLOITABLE)')
+    parser.add_argument('--wait_for_scan', action='store_true', help='If the latest scan is still running, wait for it instead of using the last completed one')
+    parser.add_argument('--wait_timeout', type=float, help='With --wait_for_scan, stop waiting after this many minutes')
 
     # Set up various global variables
     args = parser.parse_args()
@@ -137,7 +448,8 @@ def main():
     projectName = args.project_name
 
     # triage scan results
-    accessToken = get_access_token(region, tenantName, apiKey)
+    tokenProvider = auth.get_provider(client.iam_base_url(region), tenantName, apiKey)
+    accessToken = tokenProvider.get_token()
 
     # steps: 
     # get scan id (most recent)
@@ -146,20 +458,25 @@ def main():
     # change predicate in each scan engine
     # triage results
 
-    scanId, projectId, engines = get_most_recent_scan(accessToken, region, projectName)
-    sast_similarity = get_sast_similarity_ids(region, accessToken, scanId)
-    get_iac_similarity_ids(region, accessToken, scanId)
-    if (sast_similarity != None):
-        for similarity_id in sast_similarity:
-            similarity_id = str(similarity_id)
-            # similarity_id = similarity_id.replace("-", "") # *this line causes change function to have 404 error on negative sim ids
-            print(similarity_id)
-            response = change_sast_predicate(region, accessToken, projectId, similarity_id, "LOW", "NOT_EXPLOITABLE", scanId)
-            if response.status_code == 201: # successful response seems to be 201 and not 204, needs investigation
-                print(f"Predicate for {similarity_id} updated successfully.")
-            else:
-                print(response.status_code)
-                print(f"Error while updating predicate for {similarity_id}: {response.text}")
+    if args.wait_for_scan:
+        scan = wait_for_latest_scan(region, tokenProvider, projectName, args.wait_timeout * 60 if args.wait_timeout else None)
+        accessToken = tokenProvider.get_token()
+    else:
+        scan = get_most_recent_scan(accessToken, region, projectName)
+    if scan is None:
+        return
+    scanId, projectId, engines = scan
+    engines = [engine for engine in engines if engine in (args.engines or TRIAGE_ENGINES)]
+    skipped = [engine for engine in scan[2] if engine not in engines]
+    if skipped:
+        print(f"Not triaging engines: {', '.join(skipped)}")
+    if not engines:
+        print("No engines to triage in this scan.")
+        return
+    summary = triage_scan(region, tokenProvider, projectId, scanId, engines, args.severity, args.state,
+                          workers=args.workers, rate_limit=args.rate_limit, max_retries=args.max_retries,
+                          batch_size=args.batch_size)
+    print_triage_summary(summary)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
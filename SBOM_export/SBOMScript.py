@@ -1,41 +1,28 @@
-import requests
 import argparse
+import os
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def get_access_token(region, tenantName, apiKey):
-    """
-    Generates an access token using the provided API key.
-    """
-    if region == "":
-        url = "https://iam.checkmarx.net/auth/realms/" + tenantName + "/protocol/openid-connect/token"
-    else:
-        url = "https://" + region + ".iam.checkmarx.net/auth/realms/" + tenantName + "/protocol/openid-connect/token"
-    payload = 'grant_type=refresh_token&client_id=ast-app&refresh_token=' + apiKey 
-    headers = {   'Content-Type': 'application/x-www-form-urlencoded'
-    }
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from cxone import auth, client, download, filecache, polling, retry
 
-    response = requests.request("POST", url, headers=headers, data=payload)
-
-    if response.status_code != 200:
-        raise Exception(f"Failed to get access token: {response.text}")
-        
-    return response.json().get("access_token")
+DEFAULT_EXPORT_TIMEOUT = 3600  # seconds
+DEFAULT_CACHE_MAX_MB = 2048
+EXPORT_PARAMETERS = {
+    "hideDevAndTestDependencies": True,
+    "showOnlyEffectiveLicenses": False
+}
 
 def generate_sbom_report(scanId, fileFormat, accessToken, region):
     """
     Generates a Software Bill of Materials (SBOM) report for a given scan ID.
     """
-    if region == "":
-        url = "https://ast.checkmarx.net/api/sca/export/requests"
-    else:
-        url = "https://" + region + ".ast.checkmarx.net/api/sca/export/requests"
+    url = client.api_url(region, "/api/sca/export/requests")
     payload = {
         "scanId": scanId,
         "fileFormat": fileFormat,
-        "exportParameters": {
-            "hideDevAndTestDependencies": True,
-            "showOnlyEffectiveLicenses": False
-        }
+        "exportParameters": EXPORT_PARAMETERS
     }
     headers = {
         "Content-Type": "application/json",
@@ -43,109 +30,266 @@ def generate_sbom_report(scanId, fileFormat, accessToken, region):
         "Authorization": f'Bearer {accessToken}'
     }
 
-    response = requests.request("POST", url, json=payload, headers=headers) 
+    response = client.request("POST", url, json=payload, headers=headers) 
 
     # save the export id from the response
     data = response.json().get("exportId")
     return data
 
-def check_report_status(exportId, accessToken, region, maxRetries, baseDelay):
+def get_export_status(exportId, accessToken, region):
     """
-    Checks the status of the report using the export ID.
+    Fetches the export status once. Returns the status JSON, or None after a
+    transient failure (5xx left over after retrying). Raises on other 4xx
+    responses (expired token, unknown export ID): polling again cannot help.
     """
-    
-    # make the request to check the report status
-    if region == "":
-        url = "https://ast.checkmarx.net/api/sca/export/requests"
-    else:
-        url = "https://" + region + ".ast.checkmarx.net/api/sca/export/requests"
-    params = {
-        "exportId": exportId
-    }
+    url = client.api_url(region, "/api/sca/export/requests")
+    params = {"exportId": exportId}
     headers = {
         "Content-Type": "application/json",
         "Accept": "text/plain, application/json, text/json",
         "Authorization": f'Bearer {accessToken}'
     }
+    response = retry.request_with_retry("GET", url, max_retries=3, params=params, headers=headers)
+    if 400 <= response.status_code < 500 and response.status_code not in retry.RETRY_STATUSES:
+        raise Exception(f"Failed to get status of export {exportId}: {response.status_code} {response.text}")
+    if response.status_code != 200:
+        return None
+    return response.json()
 
-    for attempt in range(maxRetries):
-        try:
-            response = requests.request("GET", url, params=params, headers=headers)
-
-            if response.status_code == 200:
-                print("Successfully checked report status.")
-                return response
-            
-            print(f"Attempt {attempt + 1} failed with status {response.status_code}, retrying...")
-            print(f"Response content: {response.text}")
-        
-        except requests.RequestException as e:
-            print(f"Attempt {attempt + 1} failed with error: {e}")
-        
-        #exponential backoff delay
-        sleepTime = baseDelay * (2 ** attempt)
-        print(f"Waiting {sleepTime} seconds before retrying...")
-        time.sleep(sleepTime)
-
-    print("Max retries reached. Could not check report status.")
-    return False
-
-def download_sbom_report(exportId, accessToken, region, max_attempts=10):
-    if region == "":
-        status_url = "https://ast.checkmarx.net/api/sca/export/requests"
-    else:
-        status_url = "https://" + region + ".ast.checkmarx.net/api/sca/export/requests"
+def wait_for_export(exportId, fileFormat, tokenProvider, region, poller, timeout=DEFAULT_EXPORT_TIMEOUT):
+    """
+    Polls the export until it completes, fails or the timeout passes. The
+    token is read from tokenProvider for every poll, so long waits outlive it.
+
+    Returns the final status JSON (check its exportStatus), or None on timeout.
+    Raises if the status request is rejected (see get_export_status).
+    """
+    start = time.monotonic()
+    while True:
+        data = get_export_status(exportId, tokenProvider.get_token(), region) or {}
+        status = data.get("exportStatus")
+        elapsed = time.monotonic() - start
+
+        if status == "Completed" and data.get("fileUrl"):
+            poller.record(fileFormat, elapsed)
+            return data
+        if status in ("Failed", "Error"):
+            return data
+
+        remaining = timeout - elapsed
+        if remaining <= 0:
+            return None
+        waitTime = min(poller.next_interval(fileFormat, elapsed), remaining)
+        print(f"Report not ready yet (status: {status}). Waiting {waitTime:.1f}s...")
+        time.sleep(waitTime)
+
+def sbom_cache_key(tenantName, scanId, fileFormat):
+    """
+    A completed scan's SBOM never changes, so it is identified by what was asked for.
+    """
+    return filecache.cache_key("sbom", tenantName, scanId, fileFormat, EXPORT_PARAMETERS)
+
+def download_sbom_report(exportId, tokenProvider, region, fileFormat, poller=None, timeout=DEFAULT_EXPORT_TIMEOUT):
+    """
+    Waits for the export and downloads it. Returns the file name, or None on failure.
+    """
+    if poller is None:
+        poller = polling.AdaptivePoller()
+    try:
+        data = wait_for_export(exportId, fileFormat, tokenProvider, region, poller, timeout)
+    except Exception as e:
+        print(e)
+        return
+    if data is None:
+        print("Failed to retrieve report status and download report before the timeout.")
+        return
+    if data.get("exportStatus") != "Completed":
+        print(f"Report generation failed: {data}")
+        return
+
+    file_url = data["fileUrl"]
+    filename = file_url.split("/")[-2]  # Or use another method to name file
+    headers = {"Authorization": f'Bearer {tokenProvider.get_token()}'}
+    try:
+        # streamed to disk in chunks, resumed with a Range request if the connection drops
+        size = download.download_file(file_url, filename, headers=headers)
+        print(f"Downloaded file: {filename} ({size} bytes)")
+        return filename
+    except Exception as e:
+        print(f"Failed to download file from fileUrl: {e}")
+
+def get_latest_scan_ids(region, accessToken, pageSize=100):
+    """
+    Returns the ID of the latest completed scan of every project in the tenant.
+    """
+    url = client.api_url(region, "/api/projects/last-scan")
     headers = {
-        "Content-Type": "application/json",
-        "Accept": "text/plain, application/json, text/json",
+        "Accept": "application/json; version=1.0",
         "Authorization": f'Bearer {accessToken}'
     }
-    params = {"exportId": exportId}
-    wait_time = 2  # seconds
-
-    for attempt in range(max_attempts):
-        response = requests.get(status_url, params=params, headers=headers)
-        print(response.text)
+    scanIds = []
+    offset = 0
+    while True:
+        params = {"offset": offset, "limit": pageSize, "scan-status": "Completed"}
+        response = retry.request_with_retry("GET", url, params=params, headers=headers)
         if response.status_code != 200:
-            print(f"Failed to check report status: {response.text}")
-            time.sleep(wait_time)
-            wait_time = min(wait_time * 2, 60)  # exponential backoff, max 60s
-            continue
+            raise Exception(f"Failed to get latest scans: {response.text}")
+        # the response maps project ID -> last scan
+        lastScans = response.json() or {}
+        scanIds.extend(scan["id"] for scan in lastScans.values() if scan.get("id"))
+        if len(lastScans) < pageSize:
+            return scanIds
+        offset += pageSize
+
+def read_scan_ids(path):
+    """
+    Reads scan IDs from a file, one per line. Blank lines and # comments are ignored.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith("#")]
 
+def sbom_filename(scanId, fileFormat):
+    extension = ".xml" if fileFormat.lower().endswith("xml") else ".json"
+    return f"{scanId}_{fileFormat}{extension}"
 
-        data = response.json()
-        status = data.get("exportStatus")
-        file_url = data.get("fileUrl")
-
-        if status == "Completed" and file_url:
-            filename = file_url.split("/")[-2]  # Or use another method to name file
-            file_response = requests.request("GET", file_url, headers=headers)
-            if file_response.status_code == 200:
-                with open(filename, "wb") as f:
-                    f.write(file_response.content)
-                print(f"Downloaded file: {filename}")
-                return
-            else:
-                print(f"Failed to download file from fileUrl: {file_response.status_code}")
-                return
-        elif status in ("Failed", "Error"):
-            print(f"Report generation failed: {data}")
-            return
+def export_sboms(region, tokenProvider, scanIds, fileFormat, outputDir=".", workers=8, poller=None, timeout=DEFAULT_EXPORT_TIMEOUT,
+                 cache=None, tenantName=None, refresh=False):
+    """
+    Exports the SBOM of many scans at once.
+
+    Every export is requested up front, then a single scheduler polls all
+    pending exports (each on its own adaptive interval) and hands completed ones to a
+    download pool, so no export waits for another one's polling loop.
+    Scans already in the cache are copied out without any API calls unless
+    refresh is set. Returns one result dict per scan.
+    """
+    if poller is None:
+        poller = polling.AdaptivePoller()
+    results = {scanId: {"scanId": scanId, "exportId": None, "status": "Pending", "file": None, "error": None, "cached": False} for scanId in scanIds}
+    client.configure(pool_size=max(2 * workers, client.DEFAULT_POOL_SIZE))
+    os.makedirs(outputDir, exist_ok=True)
+    deadline = time.monotonic() + timeout
+
+    toExport = []
+    for scanId in scanIds:
+        filename = os.path.join(outputDir, sbom_filename(scanId, fileFormat))
+        if cache is not None and not refresh and cache.copy_to(sbom_cache_key(tenantName, scanId, fileFormat), filename):
+            results[scanId].update({"status": "Completed", "file": filename, "cached": True})
         else:
-            print(f"Report not ready yet (status: {status}). Waiting {wait_time}s...")
-            time.sleep(wait_time)
-            wait_time = min(wait_time * 2, 60)  # exponential backoff
+            toExport.append(scanId)
+    if cache is not None:
+        print(f"{len(scanIds) - len(toExport)} SBOMs served from cache.")
+
+    with ThreadPoolExecutor(max_workers=workers) as apiPool, ThreadPoolExecutor(max_workers=workers) as downloadPool:
+        # fire every export request up front
+        pending = {}
+        futures = {apiPool.submit(generate_sbom_report, scanId, fileFormat, tokenProvider.get_token(), region): scanId for scanId in toExport}
+        for future in as_completed(futures):
+            scanId = futures[future]
+            try:
+                exportId = future.result()
+            except Exception as e:
+                exportId = None
+                results[scanId]["error"] = str(e)
+            if exportId:
+                results[scanId]["exportId"] = exportId
+                requestedAt = time.monotonic()
+                pending[exportId] = {"scanId": scanId, "requestedAt": requestedAt, "nextPoll": requestedAt + poller.next_interval(fileFormat, 0)}
+            else:
+                results[scanId]["status"] = "Failed"
+                results[scanId]["error"] = results[scanId]["error"] or "Failed to create export report."
+        print(f"Requested {len(pending)} SBOM exports.")
+
+        # one scheduler polls every pending export and starts downloads as they complete
+        downloads = {}
+        while pending and time.monotonic() < deadline:
+            now = time.monotonic()
+            due = [exportId for exportId, state in pending.items() if state["nextPoll"] <= now]
+            accessToken = tokenProvider.get_token()
+            statusFutures = {apiPool.submit(get_export_status, exportId, accessToken, region): exportId for exportId in due}
+            for future in as_completed(statusFutures):
+                exportId = statusFutures[future]
+                state = pending[exportId]
+                result = results[state["scanId"]]
+                try:
+                    data = future.result() or {}
+                except Exception as e:
+                    # rejected status request (e.g. unknown export): give up on it instead of polling until the deadline
+                    del pending[exportId]
+                    result["status"] = "Failed"
+                    result["error"] = str(e)
+                    continue
+                status = data.get("exportStatus")
+                elapsed = time.monotonic() - state["requestedAt"]
+
+                if status == "Completed" and data.get("fileUrl"):
+                    del pending[exportId]
+                    poller.record(fileFormat, elapsed)
+                    result["status"] = "Downloading"
+                    filename = os.path.join(outputDir, sbom_filename(state["scanId"], fileFormat))
+                    headers = {"Authorization": f'Bearer {accessToken}'}
+                    downloads[downloadPool.submit(download.download_file, data["fileUrl"], filename, headers)] = (state["scanId"], filename)
+                elif status in ("Failed", "Error"):
+                    del pending[exportId]
+                    result["status"] = "Failed"
+                    result["error"] = f"Report generation failed: {data}"
+                else:
+                    state["nextPoll"] = time.monotonic() + poller.next_interval(fileFormat, elapsed)
+
+            if pending:
+                nextPoll = min(state["nextPoll"] for state in pending.values())
+                time.sleep(max(0, min(nextPoll, deadline) - time.monotonic()))
+
+        for exportId, state in pending.items():
+            results[state["scanId"]]["status"] = "Failed"
+            results[state["scanId"]]["error"] = "Timed out waiting for export to complete."
+
+        for future in as_completed(downloads):
+            scanId, filename = downloads[future]
+            try:
+                future.result()
+                results[scanId]["status"] = "Completed"
+                results[scanId]["file"] = filename
+                if cache is not None:
+                    cache.put(sbom_cache_key(tenantName, scanId, fileFormat), filename,
+                              {"scanId": scanId, "fileFormat": fileFormat, "filename": os.path.basename(filename)})
+            except Exception as e:
+                results[scanId]["status"] = "Failed"
+                results[scanId]["error"] = str(e)
+
+    return list(results.values())
+
+def print_export_summary(results, elapsed):
+    completed = [r for r in results if r["status"] == "Completed"]
+    failed = [r for r in results if r["status"] != "Completed"]
+    print(f"Exported {len(completed)}/{len(results)} SBOMs in {elapsed:.1f}s.")
+    for result in failed:
+        print(f"  {result['scanId']}: {result['error']}")
+
+def print_latency_summary(poller):
+    for fileFormat, stats in poller.latency_summary().items():
+        print(f"Export time for {fileFormat} ({stats['count']} samples): min {stats['min']:.1f}s, p50 {stats['p50']:.1f}s, "
+              f"p90 {stats['p90']:.1f}s, p99 {stats['p99']:.1f}s, max {stats['max']:.1f}s")
 
-    print("Failed to retrieve report status and download report after many attempts.")
-    
 def main():
     # Obtain command line arguments
     parser = argparse.ArgumentParser(description='Export a CxOne scan workflow as a CSV file')
     parser.add_argument('--region', required=True, help='Region for the API endpoint (e.g., us, eu)')
     parser.add_argument('--tenant_name', required=True, help='Tenant name')
     parser.add_argument('--api_key', required=True, help='API key for authentication')
-    parser.add_argument('--scan_id', required=True, help='Scan ID for the report')
+    scans = parser.add_mutually_exclusive_group(required=True)
+    scans.add_argument('--scan_id', help='Scan ID for the report')
+    scans.add_argument('--scan_ids_file', help='File with one scan ID per line (bulk mode)')
+    scans.add_argument('--all_projects', action='store_true', help='Export the latest completed scan of every project (bulk mode)')
     parser.add_argument('--format', required=True, help='File format of the SBOM report (e.g., CycloneDxJson, SpdxJson, or CycloneDxXml)')
+    parser.add_argument('--output_dir', default='.', help='Directory for the downloaded reports in bulk mode')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent API requests and downloads in bulk mode')
+    parser.add_argument('--timeout', type=int, default=DEFAULT_EXPORT_TIMEOUT, help='Overall deadline in seconds for exports to complete')
+    parser.add_argument('--poll_history', help='JSON file used to remember export times between runs so polling adapts')
+    parser.add_argument('--cache_dir', default=os.path.join(filecache.DEFAULT_CACHE_DIR, "sbom"), help='Directory of the local SBOM cache')
+    parser.add_argument('--cache_max_mb', type=int, default=DEFAULT_CACHE_MAX_MB, help='Size limit of the SBOM cache; least recently used reports are evicted')
+    parser.add_argument('--no_cache', '--no-cache', action='store_true', help='Do not read from or write to the SBOM cache')
+    parser.add_argument('--refresh', action='store_true', help='Ignore cached reports but store the newly exported ones')
 
 
     # Set up various global variables
@@ -156,17 +300,46 @@ def main():
     scanId = args.scan_id
     fileFormat = args.format
 
-    accessToken = get_access_token(region, tenantName, apiKey)
-    exportId = generate_sbom_report(scanId, fileFormat, accessToken, region)
-    check_report_status(exportId, accessToken, region, 5, 1)
-    # if data:
-    #     download_sbom_report(data, accessToken, region, 10)
-    # else:
-    #     print("Failed to retrieve the report status and download the report.")
-    if exportId:
-        download_sbom_report(exportId, accessToken, region, 10)
+    poller = polling.AdaptivePoller()
+    if args.poll_history:
+        poller.load(args.poll_history)
+    cache = None if args.no_cache else filecache.FileCache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
+
+    if args.scan_ids_file or args.all_projects:
+        tokenProvider = auth.get_provider(client.iam_base_url(region), tenantName, apiKey)
+        if args.all_projects:
+            scanIds = get_latest_scan_ids(region, tokenProvider.get_token())
+        else:
+            scanIds = read_scan_ids(args.scan_ids_file)
+        if not scanIds:
+            print("No scans to export.")
+            return
+        start = time.perf_counter()
+        results = export_sboms(region, tokenProvider, scanIds, fileFormat, args.output_dir, args.workers, poller, args.timeout,
+                               cache, tenantName, args.refresh)
+        print_export_summary(results, time.perf_counter() - start)
     else:
-        print("Failed to create export report.")
+        cacheKey = sbom_cache_key(tenantName, scanId, fileFormat)
+        cached = cache.get_metadata(cacheKey) if cache is not None and not args.refresh else None
+        # entries stored by bulk mode may predate the filename field
+        cachedFilename = (cached.get("filename") or sbom_filename(scanId, fileFormat)) if cached else None
+        if cached and cache.copy_to(cacheKey, cachedFilename):
+            # cache hit: no export request and no polling at all
+            print(f"Using cached SBOM: {cachedFilename}")
+            return
+
+        tokenProvider = auth.get_provider(client.iam_base_url(region), tenantName, apiKey)
+        exportId = generate_sbom_report(scanId, fileFormat, tokenProvider.get_token(), region)
+        if exportId:
+            filename = download_sbom_report(exportId, tokenProvider, region, fileFormat, poller, args.timeout)
+            if filename and cache is not None:
+                cache.put(cacheKey, filename, {"scanId": scanId, "fileFormat": fileFormat, "filename": filename})
+        else:
+            print("Failed to create export report.")
+
+    print_latency_summary(poller)
+    if args.poll_history:
+        poller.save(args.poll_history)
 
 
 
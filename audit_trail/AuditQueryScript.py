@@ -0,0 +1,81 @@
+import argparse
+import calendar
+import csv
+import os
+import sys
+import time
+from datetime import datetime
+
+from event_store import COUNT_GROUPS, count_events, open_store, query_events
+from event_writers import FIELDNAMES
+
+def date_to_epoch_us(date_str, end_of_day=False):
+    """Epoch microseconds of 00:00 (or the last microsecond) of a UTC YYYY-MM-DD date."""
+    seconds = calendar.timegm(datetime.strptime(date_str, "%Y-%m-%d").timetuple())
+    return (seconds + 86400) * 1000000 - 1 if end_of_day else seconds * 1000000
+
+def print_rows(headers, rows):
+    widths = [len(h) for h in headers]
+    values = [["" if v is None else str(v) for v in row] for row in rows]
+    for row in values:
+        widths = [max(w, len(v)) for w, v in zip(widths, row)]
+    print("  ".join(h.ljust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in values:
+        print("  ".join(v.ljust(w) for v, w in zip(row, widths)))
+
+def write_rows_to_csv(headers, rows, output_file):
+    with open(output_file, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        writer.writerows(rows)
+    print(f"Wrote {len(rows)} rows to {output_file}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Query a local audit event store written by AuditTrailScript.py --format sqlite')
+    parser.add_argument('command', choices=['events', 'counts'], help='events: list matching events; counts: events per day per group')
+    parser.add_argument('--db', default='audit_trail_export.db', help='Event store to query')
+    parser.add_argument('--user', help='actionUserId or username')
+    parser.add_argument('--action_type', help='actionType, e.g. login')
+    parser.add_argument('--event_type', help='eventType')
+    parser.add_argument('--days', type=int, help='Only the last N days')
+    parser.add_argument('--start_date', help='Start date (YYYY-MM-DD), inclusive')
+    parser.add_argument('--end_date', help='End date (YYYY-MM-DD), inclusive')
+    parser.add_argument('--group_by', choices=sorted(COUNT_GROUPS), default='type', help='Grouping for counts (default: type)')
+    parser.add_argument('--limit', type=int, help='Maximum number of events to list')
+    parser.add_argument('--csv', help='Write the result to this CSV file instead of printing it')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"Event store {args.db} not found; create it with AuditTrailScript.py --format sqlite")
+        sys.exit(1)
+
+    since_us = None
+    until_us = None
+    if args.days:
+        since_us = int((time.time() - args.days * 86400) * 1000000)
+    if args.start_date:
+        since_us = max(since_us or 0, date_to_epoch_us(args.start_date))
+    if args.end_date:
+        until_us = date_to_epoch_us(args.end_date, end_of_day=True)
+
+    connection = open_store(args.db)
+    try:
+        if args.command == 'events':
+            headers = FIELDNAMES
+            rows = query_events(connection, args.user, args.action_type, args.event_type, since_us, until_us, args.limit)
+        else:
+            headers = ["day", COUNT_GROUPS[args.group_by], "events"]
+            rows = count_events(connection, args.group_by, args.user, args.action_type, args.event_type, since_us, until_us)
+    finally:
+        connection.close()
+
+    rows = [tuple(row) for row in rows]
+    if args.csv:
+        write_rows_to_csv(headers, rows, args.csv)
+    else:
+        print_rows(headers, rows)
+        print(f"{len(rows)} rows")
+
+if __name__ == "__main__":
+    main()
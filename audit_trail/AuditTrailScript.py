@@ -1,22 +1,82 @@
 import requests
 import argparse
-import csv
+import calendar
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from openpyxl import Workbook
 import os
+import queue
+import re
+import sys
+import threading
+import time
+from urllib.parse import urlparse
 
-def format_event_date(dt_str):
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from cxone import auth, client, retry
+from cxone.concurrency import AdaptiveLimiter
+from event_store import SqliteEventWriter
+from event_writers import CsvEventWriter, ExcelEventWriter, JsonlEventWriter, ParquetEventWriter, ThreadedWriter
+from incremental import IncrementalState
+
+EVENT_QUEUE_SIZE = 10000  # flattened events buffered between fetch workers and writers
+MAX_LINK_WORKERS = 16  # upper bound for the adaptive link fetch concurrency
+LINK_MAX_ATTEMPTS = 5
+PROBE_BYTES = 4096  # bytes read from each end of a day file to find its first/last event
+_END_OF_EVENTS = object()
+_LINK_DATE_KEYS = ("date", "day", "startDate")
+_URL_DATE = re.compile(r"(?<![0-9A-Za-z])(\d{4})([-/_]?)(\d{2})\2(\d{2})(?![0-9A-Za-z])")
+_EVENT_DATE = re.compile(r'"eventDate"\s*:\s*"([^"]+)"')
+
+def _days_from_civil(year, month, day):
+    """Days since 1970-01-01 for a proleptic Gregorian date."""
+    year -= month <= 2
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+def datetime_to_epoch_us(dt):
+    """Microseconds since the epoch for a naive UTC datetime."""
+    days = _days_from_civil(dt.year, dt.month, dt.day)
+    return (days * 86400 + dt.hour * 3600 + dt.minute * 60 + dt.second) * 1000000 + dt.microsecond
+
+def parse_event_date(dt_str):
+    """
+    Parses an eventDate once and returns (epoch microseconds, "MM/DD/YYYY HH:MM"),
+    or (None, "") when there is no date.
+
+    Handles "YYYY-MM-DDTHH:MM:SS[.fraction]Z" by slicing the fixed-width fields
+    (fractions beyond microseconds are truncated, as before); anything else
+    goes through the strptime-based parse_iso_event_date.
+    """
     if not dt_str:
-        return ""
-    if '.' in dt_str:
-        base, frac = dt_str.split('.')
-        frac = frac.rstrip('Z')[:6]
-        dt_str_fixed = f"{base}.{frac}Z"
-    else:
-        dt_str_fixed = dt_str
-    dt = datetime.strptime(dt_str_fixed, "%Y-%m-%dT%H:%M:%S.%fZ")
-    return dt.strftime("%m/%d/%Y %H:%M")
+        return None, ""
+    if (len(dt_str) >= 20 and dt_str[-1] == "Z" and dt_str[4] == "-" and dt_str[7] == "-"
+            and dt_str[10] == "T" and dt_str[13] == ":" and dt_str[16] == ":" and dt_str[19] in ".Z"):
+        try:
+            year = int(dt_str[0:4])
+            month = int(dt_str[5:7])
+            day = int(dt_str[8:10])
+            hour = int(dt_str[11:13])
+            minute = int(dt_str[14:16])
+            second = int(dt_str[17:19])
+            fraction = dt_str[20:-1]
+            microsecond = int(fraction[:6].ljust(6, "0")) if fraction else 0
+        except ValueError:
+            pass
+        else:
+            # days past the 28th are checked against the real month length, as strptime would
+            if (year >= 1 and 1 <= month <= 12 and 1 <= day and (day <= 28 or day <= calendar.monthrange(year, month)[1])
+                    and hour < 24 and minute < 60 and second < 60):
+                days = _days_from_civil(year, month, day)
+                epoch_us = (days * 86400 + hour * 3600 + minute * 60 + second) * 1000000 + microsecond
+                return epoch_us, f"{dt_str[5:7]}/{dt_str[8:10]}/{dt_str[0:4]} {dt_str[11:16]}"
+    dt = parse_iso_event_date(dt_str)
+    return datetime_to_epoch_us(dt), dt.strftime("%m/%d/%Y %H:%M")
+
+def format_event_date(dt_str):
+    return parse_event_date(dt_str)[1]
 
 def parse_iso_event_date(dt_str):
     """Parses ISO event date string to datetime object for filtering."""
@@ -30,9 +90,9 @@ def parse_iso_event_date(dt_str):
         dt_str_fixed = dt_str
     return datetime.strptime(dt_str_fixed, "%Y-%m-%dT%H:%M:%S.%fZ")
 
-def flatten_event(event):
+def flatten_event(event, event_date=None):
     flat = {}
-    flat["EventDate"] = format_event_date(event.get("eventDate"))
+    flat["EventDate"] = event_date if event_date is not None else format_event_date(event.get("eventDate"))
     flat["actionType"] = event.get("actionType")
     flat["actionUserId"] = event.get("actionUserId")
     flat["auditResource"] = event.get("auditResource")
@@ -48,109 +108,280 @@ def flatten_event(event):
         flat["details_username"] = data.get("username")
     return flat
 
+def date_range_bounds(start_dt, end_dt):
+    """Converts the --start_date/--end_date datetimes to epoch microseconds once."""
+    return (datetime_to_epoch_us(start_dt) if start_dt else None,
+            datetime_to_epoch_us(end_dt) if end_dt else None)
+
+def flatten_event_in_range(event, start_us=None, end_us=None):
+    """
+    Parses the event date once, filters on the epoch value and flattens the
+    event. Returns None for events outside the range (inclusive) or without a date.
+    """
+    epoch_us, event_date = parse_event_date(event.get("eventDate"))
+    if epoch_us is None:
+        return None
+    if start_us is not None and epoch_us < start_us:
+        return None
+    if end_us is not None and epoch_us > end_us:
+        return None
+    flat = flatten_event(event, event_date)
+    # not a column; lets later stages use the parsed time without parsing again
+    flat["_eventEpochUs"] = epoch_us
+    return flat
+
 def event_in_date_range(event, start_dt, end_dt):
     """Returns True if event is within the date range (inclusive)."""
-    event_dt = parse_iso_event_date(event.get("eventDate"))
-    if event_dt is None:
-        return False
-    if start_dt and event_dt < start_dt:
-        return False
-    if end_dt and event_dt > end_dt:
-        return False
-    return True
-
-def get_all_events(audit_data, start_dt=None, end_dt=None):
-    return [
-        flatten_event(e)
-        for e in audit_data.get("events", [])
-        if event_in_date_range(e, start_dt, end_dt)
-    ]
-
-def fetch_and_flatten_events(link, headers, start_dt=None, end_dt=None):
+    start_us, end_us = date_range_bounds(start_dt, end_dt)
+    return flatten_event_in_range(event, start_us, end_us) is not None
+
+def iter_events(audit_data, start_dt=None, end_dt=None, event_filter=None):
+    start_us, end_us = date_range_bounds(start_dt, end_dt)
+    for e in audit_data.get("events", []):
+        flat = flatten_event_in_range(e, start_us, end_us)
+        if flat is not None and (event_filter is None or event_filter(e, flat)):
+            yield flat
+
+def fetch_link_events(link, headers):
+    """
+    Downloads one day link and returns its raw events.
+    """
+    log_response = client.get(link.get("url"), headers=headers)
+    log_response.raise_for_status()
+    log_json = log_response.json()
+    if isinstance(log_json, list):
+        return log_json
+    elif isinstance(log_json, dict) and "events" in log_json:
+        return log_json["events"]
+    return []
+
+def flatten_link_events(day_events, start_dt=None, end_dt=None, event_filter=None):
+    # Filter events by date range here
+    start_us, end_us = date_range_bounds(start_dt, end_dt)
+    for e in day_events:
+        flat = flatten_event_in_range(e, start_us, end_us)
+        if flat is not None and (event_filter is None or event_filter(e, flat)):
+            yield flat
+
+def fetch_link_with_retry(link, headers, limiter, max_attempts=LINK_MAX_ATTEMPTS):
+    """
+    Fetches a day link through the adaptive limiter. 429/5xx responses, connection
+    errors and truncated bodies are retried (honouring Retry-After) up to
+    max_attempts times; other HTTP errors fail at once. Returns the raw events.
+    """
+    for attempt in range(max_attempts):
+        limiter.acquire()
+        started = time.monotonic()
+        try:
+            day_events = fetch_link_events(link, headers)
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if status not in retry.RETRY_STATUSES:
+                limiter.release()
+                raise
+            limiter.release(throttled=True, retry_after=retry.retry_after_seconds(e.response))
+            error = e
+        except (requests.RequestException, ValueError) as e:
+            limiter.release(throttled=isinstance(e, requests.RequestException))
+            error = e
+        else:
+            limiter.release(latency=time.monotonic() - started)
+            return day_events
+        if attempt + 1 < max_attempts:
+            print(f"Retrying {link_label(link)} after error: {error}")
+            time.sleep(retry.backoff_delay(attempt))
+    raise error
+
+def fetch_links(links, headers, handle_events, limiter=None, max_attempts=LINK_MAX_ATTEMPTS, failed_links=None, stop=None):
+    """
+    Fetches every day link, at most limiter.limit at a time, and calls
+    handle_events(link, raw_events) from the worker thread. Links that still
+    fail after retrying are printed and appended to failed_links. Once the
+    stop event is set, links that have not started yet are skipped.
+    """
+    limiter = limiter or AdaptiveLimiter()
+
+    def fetch(link):
+        if not link.get("url") or (stop is not None and stop.is_set()):
+            return
+        try:
+            handle_events(link, fetch_link_with_retry(link, headers, limiter, max_attempts))
+        except Exception as e:
+            print(f"Error fetching {link_label(link)}: {e}")
+            if failed_links is not None:
+                failed_links.append(link)
+
+    # one thread per possible slot; the limiter decides how many of them are fetching
+    with ThreadPoolExecutor(max_workers=limiter.max_limit) as executor:
+        futures = [executor.submit(fetch, link) for link in links]
+        for future in as_completed(futures):
+            future.result()
+    return limiter
+
+def link_label(link):
+    """A day link for messages: its date and URL without the (signed) query string."""
+    url = (link.get("url") or "").split("?", 1)[0]
+    return f"{link.get('date')} {url}" if link.get("date") else url
+
+def print_failed_links(failed_links):
+    if not failed_links:
+        return
+    print(f"WARNING: {len(failed_links)} day links could not be fetched; their events are missing from this export:")
+    for link in failed_links:
+        print(f"  {link_label(link)}")
+
+def _day_span(year, month, day):
+    try:
+        start = datetime(int(year), int(month), int(day))
+    except ValueError:
+        return None
+    return start, start.replace(hour=23, minute=59, second=59, microsecond=999999)
+
+def _probe_link_span(log_url, headers):
+    """
+    Reads the first and last few KB of a day file with Range requests and
+    returns the (earliest, latest) eventDate found, or None.
+    """
+    dates = []
+    for byte_range in (f"bytes=0-{PROBE_BYTES - 1}", f"bytes=-{PROBE_BYTES}"):
+        response = client.get(log_url, headers=dict(headers, Range=byte_range))
+        if response.status_code not in (200, 206):
+            return None
+        dates.extend(parse_iso_event_date(d) for d in _EVENT_DATE.findall(response.text))
+        if response.status_code == 200:
+            # no Range support: we already have the whole file
+            break
+    return (min(dates), max(dates)) if dates else None
+
+def link_date_span(link, headers, probe=True):
+    """
+    Returns the (first, last) datetime a day link covers, or None if unknown.
+
+    Tries the link metadata, then a date in the URL path (2025-06-09,
+    2025/06/09 or 20250609), then a probe of the file's first and last events.
+    """
+    for key in _LINK_DATE_KEYS:
+        value = link.get(key)
+        if isinstance(value, str) and len(value) >= 10:
+            span = _day_span(value[0:4], value[5:7], value[8:10])
+            if span:
+                return span
+
     log_url = link.get("url")
-    events = []
-    if log_url:
+    if not log_url:
+        return None
+    for match in _URL_DATE.finditer(urlparse(log_url).path):
+        span = _day_span(match.group(1), match.group(3), match.group(4))
+        if span:
+            return span
+
+    if probe:
         try:
-            log_response = requests.get(log_url, headers=headers)
-            log_response.raise_for_status()
-            log_json = log_response.json()
-            if isinstance(log_json, list):
-                day_events = log_json
-            elif isinstance(log_json, dict) and "events" in log_json:
-                day_events = log_json["events"]
-            else:
-                day_events = []
-            # Filter events by date range here
-            for e in day_events:
-                if event_in_date_range(e, start_dt, end_dt):
-                    events.append(flatten_event(e))
+            return _probe_link_span(log_url, headers)
         except Exception as e:
-            print(f"Error fetching {log_url}: {e}")
-    return events
+            print(f"Could not probe {log_url}: {e}")
+    return None
+
+def filter_links_by_date(links, headers, start_dt=None, end_dt=None, max_workers=8):
+    """
+    Drops day links whose covered dates lie entirely outside [start_dt, end_dt].
+    Links whose date cannot be determined are kept. Returns (kept, skipped_count).
+    """
+    if not start_dt and not end_dt:
+        return list(links), 0
 
-def get_all_events_from_links_multithreaded(links, headers, start_dt=None, end_dt=None, max_workers=8):
-    all_events = []
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = [
-            executor.submit(fetch_and_flatten_events, link, headers, start_dt, end_dt)
-            for link in links
-        ]
-        for future in as_completed(futures):
-            all_events.extend(future.result())
-    return all_events
-
-def write_events_to_csv(events, output_file):
-    fieldnames = [
-        "EventDate",
-        "actionType",
-        "actionUserId",
-        "auditResource",
-        "details_id",
-        "details_status",
-        "details_username",
-        "eventType",
-        "ipAddress"
-    ]
-
-    # add on the .csv suffix
-    output_file = output_file + ".csv"
-
-    # write to CSV file
-    with open(output_file, "w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        for event in events:
-            writer.writerow(event)
-
-def write_events_to_excel(events, output_file):
-    headers = [
-        "EventDate",
-        "actionType",
-        "actionUserId",
-        "auditResource",
-        "details_id",
-        "details_status",
-        "details_username",
-        "eventType",
-        "ipAddress"
-    ]
-
-    # initialize the workbook and worksheet
-    wb = Workbook()
-    ws = wb.active
-    ws.title = output_file
-
-    # write the data
-    ws.append(headers)
-    for event in events:
-        row = [event.get(h, "") for h in headers]
-        ws.append(row)
-    
-    # save file in current directory
-    current_dir = os.getcwd()
-    filename = output_file + ".xlsx"
-    filepath = os.path.join(current_dir, filename)
-    wb.save(filepath)
+        spans = list(executor.map(lambda link: link_date_span(link, headers), links))
+
+    kept = []
+    for link, span in zip(links, spans):
+        if span is not None:
+            first, last = span
+            if (start_dt and last < start_dt) or (end_dt and first > end_dt):
+                continue
+        kept.append(link)
+    return kept, len(links) - len(kept)
+
+def produce_events(audit_data, headers, event_queue, start_dt=None, end_dt=None, max_workers=MAX_LINK_WORKERS, event_filter=None,
+                   failed_links=None, limiter=None, link_attempts=LINK_MAX_ATTEMPTS, stop=None):
+    """
+    Pushes today's events and then every day link's events into event_queue.
+
+    Fetch workers block on the bounded queue when the writers fall behind, so
+    at most one parsed day per worker plus the queue is held in memory. How
+    many links are fetched at once adapts to the server (see
+    cxone.concurrency), up to max_workers. event_filter(raw, flat) can drop
+    events; links that still fail after retrying are appended to failed_links.
+    Setting the stop event makes the workers stop queueing events.
+    """
+    stop = stop or threading.Event()
+
+    # an event that passed event_filter is always queued (the consumer drains the queue after stop), so
+    # stream_events can account for it; stop is checked before the next one is read
+    def pump_link(link, day_events):
+        for event in flatten_link_events(day_events, start_dt, end_dt, event_filter):
+            event_queue.put(event)
+            if stop.is_set():
+                return
+
+    try:
+        for event in iter_events(audit_data, start_dt, end_dt, event_filter):
+            event_queue.put(event)
+            if stop.is_set():
+                return
+        fetch_links(audit_data.get("links", []), headers, pump_link,
+                    limiter or AdaptiveLimiter(max_limit=max_workers), link_attempts, failed_links, stop)
+    finally:
+        event_queue.put(_END_OF_EVENTS)
+
+def stream_events(audit_data, headers, writers, start_dt=None, end_dt=None, max_workers=MAX_LINK_WORKERS, queue_size=EVENT_QUEUE_SIZE,
+                  event_filter=None, failed_links=None, limiter=None, link_attempts=LINK_MAX_ATTEMPTS, on_unwritten=None):
+    """
+    Runs the fetch workers in the background and appends each event to every
+    writer as it arrives. Returns the number of events written.
+
+    An error in the producer (e.g. an unparseable event) or in a writer is
+    raised here once the fetch workers have stopped, so a broken export never
+    looks like a complete one. After a writer error, on_unwritten(event) is
+    called for the failed event and every event still queued.
+    """
+    event_queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    producer_errors = []
+
+    def produce():
+        try:
+            produce_events(audit_data, headers, event_queue, start_dt, end_dt, max_workers, event_filter, failed_links, limiter,
+                           link_attempts, stop)
+        except Exception as e:
+            producer_errors.append(e)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    count = 0
+    event = None
+    try:
+        while True:
+            event = event_queue.get()
+            if event is _END_OF_EVENTS:
+                break
+            for writer in writers:
+                writer.write(event)
+            count += 1
+    except BaseException:
+        # workers blocked on the full queue would never finish: stop them and drain until the producer is done
+        stop.set()
+        while event is not _END_OF_EVENTS:
+            if event is not None and on_unwritten is not None:
+                on_unwritten(event)
+            event = event_queue.get()
+        producer.join()
+        raise
+    producer.join()
+    if producer_errors:
+        raise producer_errors[0]
+    return count
 
 def main():
     parser = argparse.ArgumentParser(description='Export CxOne audit events as a CSV file')
@@ -158,8 +389,14 @@ def main():
     parser.add_argument('--tenant_name', required=True, help='Tenant name')
     parser.add_argument('--api_key', required=True, help='API key for authentication')
     parser.add_argument('--output', default='audit_trail_export', help='Output file name')
+    parser.add_argument('--format', nargs='+', choices=['csv', 'xlsx', 'jsonl', 'parquet', 'sqlite'], default=['csv', 'xlsx'],
+                        help='Output formats to write (default: csv xlsx); parquet needs pyarrow, sqlite loads <output>.db for AuditQueryScript.py')
     parser.add_argument('--start_date', help='Start date (YYYY-MM-DD), inclusive', required=False)
     parser.add_argument('--end_date', help='End date (YYYY-MM-DD), inclusive', required=False)
+    parser.add_argument('--incremental', action='store_true', help='Only export events newer than the last run and append them to the existing CSV')
+    parser.add_argument('--state_file', help='State file for --incremental (default: <output>.state.json)')
+    parser.add_argument('--max_workers', type=int, default=MAX_LINK_WORKERS, help=f'Maximum concurrent day link downloads; the actual number adapts to the server (default: {MAX_LINK_WORKERS})')
+    parser.add_argument('--link_attempts', type=int, default=LINK_MAX_ATTEMPTS, help=f'Attempts per day link before it is reported as failed (default: {LINK_MAX_ATTEMPTS})')
     args = parser.parse_args()
     region = args.region
     tenantName = args.tenant_name
@@ -173,24 +410,18 @@ def main():
     if end_dt:
         end_dt = end_dt.replace(hour=23, minute=59, second=59, microsecond=999999)
 
-    # Generate a new access token via the API key
-    url = f"https://{region}.iam.checkmarx.net/auth/realms/{tenantName}/protocol/openid-connect/token"
-    payload = f'grant_type=refresh_token&client_id=ast-app&refresh_token={apiKey}'
-    headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-
-    response = requests.post(url, headers=headers, data=payload)
-    data = response.json()
-    accessToken = data["access_token"]
+    # Generate a new access token via the API key (reused if still cached)
+    accessToken = auth.get_access_token(region, tenantName, apiKey)
 
     # Audit trail script portion:
-    audit_url = f"https://{region}.ast.checkmarx.net/api/audit/"
+    audit_url = client.api_url(region, "/api/audit/")
     headers = {
         'Authorization': f'Bearer {accessToken}',
         'Accept': 'application/json'
     }
 
     try:
-        response = requests.get(audit_url, headers=headers)
+        response = client.get(audit_url, headers=headers)
         audit_data = response.json()
         if response.status_code == 200:
             print("Audit trail status is 200")
@@ -203,14 +434,76 @@ def main():
         print("Error parsing response:", e)
         exit(1)
 
-    # Gather all events (today + previous days, with multithreading for links)
-    all_events = get_all_events(audit_data, start_dt, end_dt)
-    all_events += get_all_events_from_links_multithreaded(audit_data.get("links", []), headers, start_dt, end_dt)
+    links = audit_data.get("links", [])
+    state = None
+    if args.incremental:
+        state = IncrementalState(args.state_file or args.output + ".state.json")
+        if state.exists:
+            links = state.new_links(links)
+            print(f"Incremental export: {len(links)} new day links since the last run")
+
+    # Never download day links that lie outside the requested date range
+    links, skipped = filter_links_by_date(links, headers, start_dt, end_dt)
+    if skipped:
+        print(f"Skipped {skipped} of {skipped + len(links)} day links outside the date range")
+    audit_data = dict(audit_data, links=links)
+
+    # Stream all events (today + previous days, with multithreading for links) straight into the writers
+    if state is not None:
+        # incremental runs append to the CSV / JSONL; the first run (no state yet) starts them fresh
+        if set(args.format) - {"csv", "jsonl", "sqlite"}:
+            print("Incremental mode only appends to csv, jsonl and sqlite; other formats are skipped")
+        writers = []
+        if "csv" in args.format or not set(args.format) & {"jsonl", "sqlite"}:
+            writers.append(CsvEventWriter(args.output, append=state.exists))
+        if "jsonl" in args.format:
+            writers.append(JsonlEventWriter(args.output, append=state.exists))
+        if "sqlite" in args.format:
+            writers.append(ThreadedWriter(SqliteEventWriter(args.output)))
+    else:
+        writers = []
+        if "csv" in args.format:
+            writers.append(CsvEventWriter(args.output))
+        if "jsonl" in args.format:
+            writers.append(JsonlEventWriter(args.output))
+        if "xlsx" in args.format:
+            # the XLSX writer is the slow one: give it its own thread so CSV rows are not gated on it
+            writers.append(ThreadedWriter(ExcelEventWriter(args.output)))
+        if "parquet" in args.format:
+            writers.append(ThreadedWriter(ParquetEventWriter(args.output)))
+        if "sqlite" in args.format:
+            # the store keeps rows from earlier runs; overlapping events are not inserted twice
+            writers.append(ThreadedWriter(SqliteEventWriter(args.output)))
+    failed_links = []
+    limiter = AdaptiveLimiter(initial=min(4, args.max_workers), max_limit=args.max_workers)
+    try:
+        count = stream_events(audit_data, headers, writers, start_dt, end_dt,
+                              event_filter=state.accept if state is not None else None, failed_links=failed_links, limiter=limiter,
+                              link_attempts=args.link_attempts, on_unwritten=state.forget if state is not None else None)
+    except Exception as e:
+        print(f"Export failed: {e}")
+        for writer in writers:
+            try:
+                writer.close()
+            except Exception:
+                pass
+        if state is not None:
+            # no link counts as processed, so the next run fetches these days again; the identities of the
+            # events already written are saved so they are not appended twice, and the high-water mark stays put
+            state.save(complete=False)
+        exit(1)
+    for writer in writers:
+        writer.close()
+    print(f"Exported {count} events to {', '.join(writer.path for writer in writers)}")
+    print(f"Day link concurrency: peak {limiter.peak_limit}, final {limiter.limit}, backed off {limiter.decreases} times")
+    print_failed_links(failed_links)
 
-    # Write to CSV
-    write_events_to_csv(all_events, args.output)
-    write_events_to_excel(all_events, args.output)
-    print(f"Exported {len(all_events)} events to {args.output}")
+    if state is not None:
+        # failed days are retried on the next run
+        state.mark_links_processed([link for link in links if link not in failed_links])
+        state.save(complete=not failed_links)
+    if failed_links:
+        exit(1)
 
 if __name__ == "__main__":
     main()
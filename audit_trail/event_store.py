@@ -0,0 +1,151 @@
+"""
+Local SQLite store of flattened audit events.
+
+Exports can be loaded into <output>.db and queried repeatedly (see
+AuditQueryScript.py) instead of re-exporting and grepping CSV files. Events
+are keyed by a hash of their columns, so loading overlapping date ranges
+again does not duplicate rows.
+"""
+import hashlib
+import sqlite3
+from datetime import datetime, timezone
+
+from event_writers import FIELDNAMES
+
+STORE_BATCH_SIZE = 5000  # rows per INSERT transaction
+COUNT_GROUPS = {
+    "type": "eventType",
+    "action": "actionType",
+    "user": "actionUserId"
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    event_id TEXT PRIMARY KEY,
+    event_time INTEGER,
+    event_day TEXT,
+    EventDate TEXT,
+    actionType TEXT,
+    actionUserId TEXT,
+    auditResource TEXT,
+    details_id TEXT,
+    details_status TEXT,
+    details_username TEXT,
+    eventType TEXT,
+    ipAddress TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_events_time ON events (event_time);
+CREATE INDEX IF NOT EXISTS idx_events_user_time ON events (actionUserId, event_time);
+CREATE INDEX IF NOT EXISTS idx_events_username_time ON events (details_username, event_time);
+CREATE INDEX IF NOT EXISTS idx_events_action_time ON events (actionType, event_time);
+CREATE INDEX IF NOT EXISTS idx_events_type_time ON events (eventType, event_time);
+"""
+_COLUMNS = ["event_id", "event_time", "event_day"] + FIELDNAMES
+_INSERT = f"INSERT OR IGNORE INTO events ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' for _ in _COLUMNS)})"
+
+
+def open_store(path):
+    """
+    Opens (and creates, if needed) the event store at path.
+    """
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.row_factory = sqlite3.Row
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+def epoch_us_to_day(epoch_us):
+    return datetime.fromtimestamp(epoch_us / 1000000, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def _text(value):
+    return None if value is None else str(value)
+
+
+def store_row(event):
+    """
+    The events-table row for a flattened event, keyed by a hash of its columns.
+    """
+    values = [_text(event.get(h)) for h in FIELDNAMES]
+    epoch_us = event.get("_eventEpochUs")
+    event_id = hashlib.sha1(repr((epoch_us, values)).encode("utf-8")).hexdigest()
+    day = epoch_us_to_day(epoch_us) if epoch_us is not None else None
+    return [event_id, epoch_us, day] + values
+
+
+class SqliteEventWriter:
+    """
+    Inserts events into <output>.db in batched transactions. Existing rows are
+    kept, so the same store can be loaded by several (incremental) runs.
+    """
+
+    def __init__(self, output_file, batch_size=STORE_BATCH_SIZE):
+        self.path = output_file + ".db"
+        self.batch_size = batch_size
+        self._connection = open_store(self.path)
+        self._rows = []
+        self.inserted = 0
+
+    def write(self, event):
+        self._rows.append(store_row(event))
+        if len(self._rows) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._rows:
+            return
+        with self._connection:
+            before = self._connection.total_changes
+            self._connection.executemany(_INSERT, self._rows)
+            self.inserted += self._connection.total_changes - before
+        self._rows = []
+
+    def close(self):
+        try:
+            self._flush()
+        finally:
+            self._connection.close()
+
+
+def _where(user=None, action_type=None, event_type=None, since_us=None, until_us=None):
+    clauses = []
+    params = []
+    if user:
+        clauses.append("(actionUserId = ? OR details_username = ?)")
+        params.extend([user, user])
+    if action_type:
+        clauses.append("actionType = ?")
+        params.append(action_type)
+    if event_type:
+        clauses.append("eventType = ?")
+        params.append(event_type)
+    if since_us is not None:
+        clauses.append("event_time >= ?")
+        params.append(since_us)
+    if until_us is not None:
+        clauses.append("event_time <= ?")
+        params.append(until_us)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def query_events(connection, user=None, action_type=None, event_type=None, since_us=None, until_us=None, limit=None):
+    """
+    Returns matching events (oldest first) as sqlite3.Row objects.
+    """
+    where, params = _where(user, action_type, event_type, since_us, until_us)
+    sql = f"SELECT {', '.join(FIELDNAMES)} FROM events{where} ORDER BY event_time"
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return connection.execute(sql, params).fetchall()
+
+
+def count_events(connection, group_by="type", user=None, action_type=None, event_type=None, since_us=None, until_us=None):
+    """
+    Returns (day, group value, count) rows, e.g. events per type per day.
+    """
+    column = COUNT_GROUPS[group_by]
+    where, params = _where(user, action_type, event_type, since_us, until_us)
+    sql = (f"SELECT event_day, {column} AS value, COUNT(*) AS events FROM events{where} "
+           f"GROUP BY event_day, {column} ORDER BY event_day, events DESC")
+    return connection.execute(sql, params).fetchall()
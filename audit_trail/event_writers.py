@@ -0,0 +1,258 @@
+"""
+Row writers for flattened audit events.
+
+Each writer appends one event at a time, so the export never has to hold the
+full event list in memory. All writers share write(event) / close().
+"""
+import csv
+import json
+import os
+import queue
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from openpyxl import Workbook
+
+FIELDNAMES = [
+    "EventDate",
+    "actionType",
+    "actionUserId",
+    "auditResource",
+    "details_id",
+    "details_status",
+    "details_username",
+    "eventType",
+    "ipAddress"
+]
+EXCEL_MAX_ROWS = 1048576  # per sheet, including the header row
+EXCEL_MAX_TITLE = 31
+WRITER_QUEUE_SIZE = 10000
+PARQUET_ROW_GROUP_SIZE = 65536  # rows buffered per day partition before a row group is written
+PARQUET_MAX_BUFFERED_ROWS = 500000  # across all partitions; the largest buffer is flushed early
+PARQUET_MAX_OPEN_FILES = 64  # day files kept open at once; others are closed and continue in a new part file
+DICTIONARY_FIELDS = ("actionType", "eventType")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_INVALID_TITLE_CHARS = re.compile(r"[\[\]:*?/\\]")
+_CLOSE = object()
+
+
+class CsvEventWriter:
+    def __init__(self, output_file, append=False):
+        # add on the .csv suffix
+        self.path = output_file + ".csv"
+        write_header = not (append and os.path.exists(self.path) and os.path.getsize(self.path) > 0)
+        self._file = open(self.path, "a" if append else "w", newline="", encoding="utf-8")
+        # events may carry internal keys (e.g. _eventEpochUs) that are not columns
+        self._writer = csv.DictWriter(self._file, fieldnames=FIELDNAMES, extrasaction="ignore")
+        if write_header:
+            self._writer.writeheader()
+
+    def write(self, event):
+        self._writer.writerow(event)
+
+    def close(self):
+        self._file.close()
+
+
+def excel_sheet_title(name, part=1):
+    """
+    Makes a valid sheet title: no []:*?/\\ characters and at most 31 characters,
+    with " (N)" appended for rollover sheets.
+    """
+    suffix = f" ({part})" if part > 1 else ""
+    base = _INVALID_TITLE_CHARS.sub("_", os.path.basename(name)) or "Sheet"
+    return base[:EXCEL_MAX_TITLE - len(suffix)] + suffix
+
+
+class ExcelEventWriter:
+    """
+    Streams rows into a write-only workbook, so openpyxl does not keep a cell
+    object per value. Starts a new sheet when one reaches Excel's row limit.
+    """
+
+    def __init__(self, output_file):
+        # save file in current directory
+        self.path = os.path.join(os.getcwd(), output_file + ".xlsx")
+        self._name = output_file
+        self._wb = Workbook(write_only=True)
+        self._sheets = 0
+        self._new_sheet()
+
+    def _new_sheet(self):
+        self._sheets += 1
+        self._ws = self._wb.create_sheet(title=excel_sheet_title(self._name, self._sheets))
+        self._ws.append(FIELDNAMES)
+        self._rows = 1
+
+    def write(self, event):
+        if self._rows >= EXCEL_MAX_ROWS:
+            self._new_sheet()
+        self._ws.append([event.get(h, "") for h in FIELDNAMES])
+        self._rows += 1
+
+    def close(self):
+        self._wb.save(self.path)
+
+
+def event_timestamp(event):
+    """
+    The event time as an aware UTC datetime, from the epoch value attached while flattening.
+    """
+    epoch_us = event.get("_eventEpochUs")
+    if epoch_us is None:
+        return None
+    return _EPOCH + timedelta(microseconds=epoch_us)
+
+
+class JsonlEventWriter:
+    """
+    One JSON object per line, with EventDate as an ISO-8601 UTC timestamp.
+    """
+
+    def __init__(self, output_file, append=False):
+        self.path = output_file + ".jsonl"
+        self._file = open(self.path, "a" if append else "w", encoding="utf-8")
+
+    def write(self, event):
+        row = {h: event.get(h) for h in FIELDNAMES}
+        timestamp = event_timestamp(event)
+        if timestamp is not None:
+            row["EventDate"] = timestamp.isoformat().replace("+00:00", "Z")
+        self._file.write(json.dumps(row) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetEventWriter:
+    """
+    Writes events to <output>.parquet/date=YYYY-MM-DD/part-N.parquet (hive
+    partitioned by day). Rows are buffered per day and written as row groups
+    while events stream in. At most max_open_files day files are open at a
+    time; when a closed day gets more rows they go to its next part file.
+    EventDate is a real UTC timestamp and actionType/eventType are
+    dictionary-encoded.
+
+    Requires pyarrow.
+    """
+
+    def __init__(self, output_file, row_group_size=PARQUET_ROW_GROUP_SIZE, max_buffered_rows=PARQUET_MAX_BUFFERED_ROWS,
+                 max_open_files=PARQUET_MAX_OPEN_FILES):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise Exception("Parquet output requires pyarrow: pip install pyarrow")
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.path = output_file + ".parquet"
+        self.row_group_size = row_group_size
+        self.max_buffered_rows = max_buffered_rows
+        self.max_open_files = max_open_files
+        self._schema = pyarrow.schema([
+            (h, pyarrow.timestamp("us", tz="UTC") if h == "EventDate"
+             else pyarrow.dictionary(pyarrow.int32(), pyarrow.string()) if h in DICTIONARY_FIELDS
+             else pyarrow.string())
+            for h in FIELDNAMES
+        ])
+        self._buffers = {}
+        # open day writers, least recently written first
+        self._writers = OrderedDict()
+        self._parts = {}
+        self._buffered = 0
+
+    def write(self, event):
+        timestamp = event_timestamp(event)
+        day = timestamp.strftime("%Y-%m-%d") if timestamp is not None else "unknown"
+        buffer = self._buffers.get(day)
+        if buffer is None:
+            buffer = self._buffers[day] = {h: [] for h in FIELDNAMES}
+        buffer["EventDate"].append(timestamp)
+        for h in FIELDNAMES[1:]:
+            value = event.get(h)
+            buffer[h].append(None if value is None else str(value))
+        self._buffered += 1
+
+        if len(buffer["EventDate"]) >= self.row_group_size:
+            self._flush(day)
+        elif self._buffered >= self.max_buffered_rows:
+            self._flush(max(self._buffers, key=lambda d: len(self._buffers[d]["EventDate"])))
+
+    def _flush(self, day):
+        buffer = self._buffers.pop(day)
+        rows = len(buffer["EventDate"])
+        if not rows:
+            return
+        self._buffered -= rows
+        pa = self._pa
+        columns = []
+        for field in self._schema:
+            if field.name in DICTIONARY_FIELDS:
+                columns.append(pa.array(buffer[field.name], type=pa.string()).dictionary_encode())
+            else:
+                columns.append(pa.array(buffer[field.name], type=field.type))
+        table = pa.Table.from_arrays(columns, schema=self._schema)
+
+        writer = self._writers.get(day)
+        if writer is not None:
+            self._writers.move_to_end(day)
+        else:
+            # a multi-year export has a partition per day: keep the file descriptors bounded
+            if len(self._writers) >= self.max_open_files:
+                self._writers.popitem(last=False)[1].close()
+            part = self._parts.get(day, 0)
+            self._parts[day] = part + 1
+            directory = os.path.join(self.path, f"date={day}")
+            os.makedirs(directory, exist_ok=True)
+            writer = self._writers[day] = self._pq.ParquetWriter(os.path.join(directory, f"part-{part}.parquet"), self._schema)
+        writer.write_table(table, row_group_size=rows)
+
+    def close(self):
+        for day in list(self._buffers):
+            self._flush(day)
+        for writer in self._writers.values():
+            writer.close()
+
+
+class ThreadedWriter:
+    """
+    Runs another writer on its own thread behind a bounded queue, so a slow
+    format (XLSX) is written concurrently with a fast one (CSV).
+    """
+
+    def __init__(self, writer, queue_size=WRITER_QUEUE_SIZE):
+        self.writer = writer
+        self.path = writer.path
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            event = self._queue.get()
+            if event is _CLOSE:
+                break
+            if self._error is None:
+                try:
+                    self.writer.write(event)
+                except Exception as e:
+                    # keep draining so the producer never blocks; reported on close
+                    self._error = e
+        try:
+            self.writer.close()
+        except Exception as e:
+            self._error = self._error or e
+
+    def write(self, event):
+        if self._error is not None:
+            raise self._error
+        self._queue.put(event)
+
+    def close(self):
+        self._queue.put(_CLOSE)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
@@ -0,0 +1,121 @@
+"""
+Persisted state for incremental audit-trail exports.
+
+The state file remembers the newest exported event (high-water mark), the
+day links already downloaded, and the identities of recently exported
+events. Today's `events` are re-served on every run and later reappear in a
+day link, so those identities are what keeps them from being appended twice.
+Events older than the identity window before the high-water mark are
+rejected outright, so a day link that comes back under a new key is not
+appended again.
+"""
+import hashlib
+import json
+import os
+import threading
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+RECENT_WINDOW_US = 2 * 86400 * 1000000  # keep identities of the last two days of events
+# query parameters of pre-signed URLs that change on every run
+_SIGNATURE_PARAMS = {"signature", "expires", "sig", "se", "st", "sp", "sv", "sr", "spr", "token",
+                     "skoid", "sktid", "skt", "ske", "sks", "skv"}
+
+
+def event_identity(event):
+    """
+    Stable identity of a raw audit event.
+    """
+    return hashlib.sha1(json.dumps(event, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def link_key(link):
+    """
+    Identifies a day link independently of its (changing) URL signature.
+    """
+    url = urlparse(link.get("url") or "")
+    query = [(k, v) for k, v in parse_qsl(url.query)
+             if k.lower() not in _SIGNATURE_PARAMS and not k.lower().startswith(("x-amz-", "x-goog-"))]
+    return f"{link.get('date', '')}|{url.netloc}{url.path}?{urlencode(sorted(query))}"
+
+
+class IncrementalState:
+    def __init__(self, path):
+        self.path = path
+        self.exists = False
+        self.high_water_mark = None
+        # mark of the last complete run: the only one later runs may filter on
+        self.saved_high_water_mark = None
+        self.processed_links = set()
+        self.recent_ids = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.exists = True
+        self.high_water_mark = self.saved_high_water_mark = data.get("highWaterMark")
+        self.processed_links = set(data.get("processedLinks", []))
+        self.recent_ids = dict(data.get("recentEventIds", {}))
+
+    def new_links(self, links):
+        """
+        Returns the links that have not been exported by a previous run.
+        """
+        return [link for link in links if link_key(link) not in self.processed_links]
+
+    def accept(self, event, flat):
+        """
+        Event filter for the export pipeline: True the first time an event is seen.
+        Events from before the identity window of the last complete run were
+        exported then and are rejected.
+        """
+        epoch_us = flat.get("_eventEpochUs")
+        if epoch_us is not None and self.saved_high_water_mark is not None and epoch_us < self.saved_high_water_mark - RECENT_WINDOW_US:
+            return False
+        identity = event_identity(event)
+        with self._lock:
+            if identity in self.recent_ids:
+                return False
+            self.recent_ids[identity] = epoch_us
+            flat["_eventId"] = identity
+            if epoch_us is not None and (self.high_water_mark is None or epoch_us > self.high_water_mark):
+                self.high_water_mark = epoch_us
+            return True
+
+    def forget(self, flat):
+        """
+        Undoes accept() for an event that was not written, so a later run exports it.
+        """
+        with self._lock:
+            self.recent_ids.pop(flat.get("_eventId"), None)
+
+    def mark_links_processed(self, links):
+        with self._lock:
+            self.processed_links.update(link_key(link) for link in links)
+
+    def save(self, complete=True):
+        """
+        Writes the state file. Pass complete=False when some day links failed:
+        the high-water mark then stays where the last complete run left it, so
+        the failed days are not rejected when the next run retries them.
+        """
+        with self._lock:
+            if complete:
+                self.saved_high_water_mark = self.high_water_mark
+            if self.saved_high_water_mark is not None:
+                cutoff = self.saved_high_water_mark - RECENT_WINDOW_US
+                self.recent_ids = {k: v for k, v in self.recent_ids.items() if v is None or v >= cutoff}
+            data = {
+                "highWaterMark": self.saved_high_water_mark,
+                "processedLinks": sorted(self.processed_links),
+                "recentEventIds": self.recent_ids
+            }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+        self.exists = True
@@ -0,0 +1,83 @@
+"""
+Micro-benchmark for audit event date handling in AuditTrailScript.
+
+"strptime" is the previous per-event path: event_in_date_range parses the
+date with parse_iso_event_date, then flatten_event parses it again to format
+it. "single parse" is flatten_event_in_range, which parses once with the
+fixed-width fast path and filters on precomputed epoch integers.
+
+Usage:
+    python benchmarks/audit_date_parsing.py --events 200000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "audit_trail"))
+import AuditTrailScript as audit
+
+
+def make_events(count):
+    events = []
+    for _ in range(count):
+        events.append({
+            "eventDate": f"2025-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}T"
+                         f"{random.randint(0, 23):02d}:{random.randint(0, 59):02d}:{random.randint(0, 59):02d}."
+                         f"{random.randint(0, 999999999):09d}Z",
+            "actionType": "login",
+            "eventType": "events.cxiam.user.account.login"
+        })
+    return events
+
+
+def strptime_path(events, start_dt, end_dt):
+    kept = 0
+    for e in events:
+        event_dt = audit.parse_iso_event_date(e["eventDate"])
+        if start_dt <= event_dt <= end_dt:
+            audit.parse_iso_event_date(e["eventDate"]).strftime("%m/%d/%Y %H:%M")
+            kept += 1
+    return kept
+
+
+def single_parse_path(events, start_dt, end_dt):
+    start_us, end_us = audit.date_range_bounds(start_dt, end_dt)
+    kept = 0
+    for e in events:
+        epoch_us, event_date = audit.parse_event_date(e["eventDate"])
+        if start_us <= epoch_us <= end_us:
+            kept += 1
+    return kept
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare strptime-based and single-parse audit event date handling')
+    parser.add_argument('--events', type=int, default=200000, help='Number of synthetic events')
+    args = parser.parse_args()
+
+    events = make_events(args.events)
+    start_dt = datetime(2025, 3, 1)
+    end_dt = datetime(2025, 9, 30, 23, 59, 59, 999999)
+
+    old_time, old_kept = timed(strptime_path, events, start_dt, end_dt)
+    new_time, new_kept = timed(single_parse_path, events, start_dt, end_dt)
+    assert old_kept == new_kept
+
+    print(f"{'path':<16}{'seconds':>10}{'events/s':>14}")
+    print(f"{'strptime':<16}{old_time:>10.3f}{args.events / old_time:>14.0f}")
+    print(f"{'single parse':<16}{new_time:>10.3f}{args.events / new_time:>14.0f}")
+    print(f"speedup: {old_time / new_time:.1f}x ({old_kept} of {args.events} events in range)")
+
+
+if __name__ == "__main__":
+    main()
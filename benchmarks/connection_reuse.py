@@ -0,0 +1,92 @@
+"""
+Benchmarks the pooled cxone.client session against per-call requests.get.
+
+Starts a local keep-alive HTTP stub server and times the same number of GETs
+through both paths, sequentially and from a thread pool. The stub speaks plain
+HTTP, so the numbers only include the TCP handshake; against the real TLS
+endpoints the gap is considerably larger.
+
+Usage:
+    python benchmarks/connection_reuse.py --requests 2000 --workers 8
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from cxone import client
+
+BODY = b'{"projects": []}'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # required for keep-alive
+    disable_nagle_algorithm = True  # headers and body are separate writes
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CountingServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connections = 0
+
+    def process_request(self, request, client_address):
+        # every accepted socket is one TCP handshake
+        self.connections += 1
+        super().process_request(request, client_address)
+
+
+def run(get, url, total, workers):
+    start = time.perf_counter()
+    if workers <= 1:
+        for _ in range(total):
+            get(url).raise_for_status()
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for response in executor.map(lambda _: get(url), range(total)):
+                response.raise_for_status()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare pooled vs per-call HTTP connections against a local stub server')
+    parser.add_argument('--requests', type=int, default=1000, help='Number of requests per run')
+    parser.add_argument('--workers', type=int, default=8, help='Thread pool size for the concurrent runs')
+    args = parser.parse_args()
+
+    server = CountingServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/api/projects/"
+    client.configure(pool_size=args.workers)
+
+    print(f"{'mode':<28}{'seconds':>10}{'req/s':>12}{'connections':>14}")
+    for workers in (1, args.workers):
+        for name, get in (("requests.get", requests.get), ("cxone.client.get", client.get)):
+            server.connections = 0
+            elapsed = run(get, url, args.requests, workers)
+            label = f"{name} x{workers}"
+            print(f"{label:<28}{elapsed:>10.3f}{args.requests / elapsed:>12.0f}{server.connections:>14}")
+
+    client.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
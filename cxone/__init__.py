@@ -0,0 +1,6 @@
+"""
+Shared helpers for the CxOne scripts in this repository.
+
+The scripts live in their own folders and are run directly, so each one adds
+the repository root to sys.path before importing from this package.
+"""
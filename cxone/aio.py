@@ -0,0 +1,305 @@
+"""
+asyncio client for the CxOne API (requires aiohttp: pip install aiohttp).
+
+One event loop keeps many requests in flight over a single pooled aiohttp
+session, so fan-out work (configs of every project, thousands of predicate
+updates, every audit day link) needs neither threads nor worker processes.
+The module has async versions of the script operations; SyncClient runs them
+on a background loop so the existing synchronous scripts can call them too.
+
+    async with AsyncClient(concurrency=500) as http:
+        projects = await retrieve_projects(http, region, token)
+        configs = await asyncio.gather(*(get_project_config_params(http, region, token, p["id"]) for p in projects))
+"""
+import asyncio
+import json
+import threading
+
+from cxone import client, retry, scans
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+DEFAULT_CONCURRENCY = 100  # requests in flight at once per AsyncClient
+DEFAULT_TIMEOUT = 300
+DEFAULT_PAGE_SIZE = 500
+RESULT_PATHS = {
+    "sast": "/api/sast-results/",
+    "kics": "/api/kics-results/"
+}
+
+
+def _require_aiohttp():
+    if aiohttp is None:
+        raise Exception("The asyncio client requires aiohttp: pip install aiohttp")
+
+
+def _query_params(params):
+    # aiohttp wants flat (key, str) pairs; the requests-style dicts here may hold lists and bools
+    if not params:
+        return None
+    pairs = []
+    for key, value in params.items():
+        for item in value if isinstance(value, (list, tuple)) else [value]:
+            if item is None:
+                continue
+            pairs.append((key, str(item).lower() if isinstance(item, bool) else str(item)))
+    return pairs
+
+
+class AsyncResponse:
+    """
+    A fully read response with the parts of the requests.Response API the scripts use.
+    """
+
+    def __init__(self, status_code, headers, text):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class AsyncClient:
+    """
+    Pooled aiohttp session that caps requests in flight and retries 429/5xx
+    responses and connection errors like retry.request_with_retry.
+    """
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, max_retries=5, base_delay=1, max_delay=60, timeout=DEFAULT_TIMEOUT):
+        _require_aiohttp()
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self._session = None
+        self._semaphore = None
+
+    async def open(self):
+        # created here, inside the running loop, so Python 3.8 binds them to the right loop
+        if self._session is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            connector = aiohttp.TCPConnector(limit=self.concurrency)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def request(self, method, url, params=None, **kwargs):
+        await self.open()
+        query = _query_params(params)
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    async with self._session.request(method, url, params=query, **kwargs) as response:
+                        result = AsyncResponse(response.status, response.headers, await response.text())
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(retry.backoff_delay(attempt, self.base_delay, self.max_delay))
+                continue
+
+            if result.status_code not in retry.RETRY_STATUSES or attempt == self.max_retries:
+                return result
+            delay = retry.retry_after_seconds(result)
+            if delay is None:
+                delay = retry.backoff_delay(attempt, self.base_delay, self.max_delay)
+            await asyncio.sleep(min(delay, self.max_delay))
+        return result
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url, **kwargs):
+        return await self.request("PUT", url, **kwargs)
+
+    async def patch(self, url, **kwargs):
+        return await self.request("PATCH", url, **kwargs)
+
+
+def _headers(access_token, accept="*/*; version=1.0"):
+    return {
+        'Authorization': f'Bearer {access_token}',
+        'Accept': accept
+    }
+
+
+async def get_all_items(http, url, headers, params=None, items_key="results", page_size=DEFAULT_PAGE_SIZE):
+    """
+    Reads the first page for the total (filteredTotalCount or totalCount), then
+    fetches every other page concurrently.
+    """
+    async def page(offset):
+        page_params = dict(params or {}, offset=offset, limit=page_size)
+        response = await http.get(url, headers=headers, params=page_params)
+        if response.status_code != 200:
+            raise Exception(f"Failed to fetch {url} (offset {offset}): {response.status_code} {response.text}")
+        return response.json()
+
+    first = await page(0)
+    items = list(first.get(items_key) or [])
+    total = first.get("filteredTotalCount", first.get("totalCount"))
+    if total is None:
+        # no count to plan with: walk the remaining pages one by one
+        offset = page_size
+        page_items = items
+        while len(page_items) >= page_size:
+            page_items = (await page(offset)).get(items_key) or []
+            items.extend(page_items)
+            offset += page_size
+        return items
+    if len(items) >= total:
+        return items
+    pages = await asyncio.gather(*(page(offset) for offset in range(page_size, total, page_size)))
+    for data in pages:
+        items.extend(data.get(items_key) or [])
+    return items
+
+
+async def retrieve_projects(http, region, access_token, filters=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Returns every project; filters are /api/projects/ query parameters (e.g. {"tags-keys": "team"}).
+    """
+    return await get_all_items(http, client.api_url(region, "/api/projects/"), _headers(access_token),
+                               filters, "projects", page_size)
+
+
+async def get_project_config_params(http, region, access_token, project_id):
+    url = client.api_url(region, "/api/configuration/project")
+    response = await http.get(url, headers=_headers(access_token), params={"project-id": project_id})
+    if response.status_code == 404:
+        return []
+    if response.status_code != 200:
+        raise Exception(f"Failed to get project config params for {project_id}: {response.status_code} {response.text}")
+    return response.json()
+
+
+async def run_scan(http, region, access_token, project_id, scan_type="git", handler=None, tags=None, config=None):
+    headers = dict(_headers(access_token), **{'Content-Type': 'application/json'})
+    payload = scans.scan_payload(project_id, scan_type, handler, tags, config)
+    response = await http.post(client.api_url(region, "/api/scans/"), json=payload, headers=headers)
+    if response.status_code not in (200, 201):
+        raise Exception(f"Failed to start scan: {response.status_code} {response.text}")
+    return response.json()
+
+
+async def get_scan_results(http, region, access_token, scan_id, engine="sast", page_size=DEFAULT_PAGE_SIZE):
+    """
+    Returns every result of one engine ("sast" or "kics") for a scan.
+    """
+    return await get_all_items(http, client.api_url(region, RESULT_PATHS[engine]), _headers(access_token, "application/json"),
+                               {"scan-id": scan_id}, "results", page_size)
+
+
+async def post_sast_predicates(http, region, access_token, project_id, similarity_ids, severity, state, comment="changed"):
+    """
+    Sets the same predicate on several similarity IDs in one request. Returns the response.
+    """
+    headers = dict(_headers(access_token), **{'Content-Type': 'application/json'})
+    payload = [{
+        "similarityId": similarity_id,
+        "projectId": project_id,
+        "severity": severity,
+        "state": state,
+        "comment": comment
+        } for similarity_id in similarity_ids]
+    return await http.post(client.api_url(region, "/api/sast-results-predicates/"), json=payload, headers=headers)
+
+
+async def fetch_audit_link(http, link, headers):
+    """
+    Downloads one audit day link and returns its raw events.
+    """
+    response = await http.get(link["url"], headers=headers)
+    if response.status_code != 200:
+        raise Exception(f"Failed to fetch {link['url'].split('?', 1)[0]}: {response.status_code}")
+    data = response.json()
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        return data.get("events", [])
+    return []
+
+
+class SyncClient:
+    """
+    Blocking facade over the async operations for the thread-based scripts.
+
+    The event loop runs on a background thread, so calls can come from any
+    thread. map() runs one operation for many argument tuples concurrently.
+    """
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, max_retries=5, timeout=DEFAULT_TIMEOUT):
+        _require_aiohttp()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self.http = AsyncClient(concurrency, max_retries, timeout=timeout)
+        self._run(self.http.open())
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def call(self, operation, *args, **kwargs):
+        """
+        Runs operation(http, *args, **kwargs) and returns its result.
+        """
+        return self._run(operation(self.http, *args, **kwargs))
+
+    def map(self, operation, arg_tuples, return_exceptions=True):
+        """
+        Runs operation(http, *args) for every tuple concurrently and returns the
+        results in order; failures are returned as exceptions unless return_exceptions is False.
+        """
+        async def gather():
+            return await asyncio.gather(*(operation(self.http, *args) for args in arg_tuples),
+                                        return_exceptions=return_exceptions)
+        return self._run(gather())
+
+    def retrieve_projects(self, region, access_token, filters=None):
+        return self.call(retrieve_projects, region, access_token, filters)
+
+    def get_project_config_params(self, region, access_token, project_id):
+        return self.call(get_project_config_params, region, access_token, project_id)
+
+    def run_scan(self, region, access_token, project_id, scan_type="git", handler=None, tags=None, config=None):
+        return self.call(run_scan, region, access_token, project_id, scan_type, handler, tags, config)
+
+    def get_scan_results(self, region, access_token, scan_id, engine="sast"):
+        return self.call(get_scan_results, region, access_token, scan_id, engine)
+
+    def post_sast_predicates(self, region, access_token, project_id, similarity_ids, severity, state):
+        return self.call(post_sast_predicates, region, access_token, project_id, similarity_ids, severity, state)
+
+    def fetch_audit_link(self, link, headers):
+        return self.call(fetch_audit_link, link, headers)
+
+    def close(self):
+        try:
+            self._run(self.http.close())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
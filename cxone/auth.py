@@ -0,0 +1,192 @@
+"""
+Process-wide access token cache shared by every CxOne script.
+
+Tokens are cached per (IAM base URL, tenant, API key) and reused until shortly
+before they expire. Inside the refresh margin the current token is still
+handed out while a background thread fetches the next one, so worker threads
+never block on IAM. Concurrent refreshes are collapsed into a single call.
+
+Setting CXONE_TOKEN_CACHE to a file path also persists tokens on disk (mode
+0600) so back-to-back cron jobs can skip the IAM exchange entirely.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from cxone import client
+
+TOKEN_CACHE_ENV = "CXONE_TOKEN_CACHE"
+DEFAULT_REFRESH_MARGIN = 60  # seconds before expiry to start refreshing
+DEFAULT_EXPIRES_IN = 600  # used when IAM does not send expires_in
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+class TokenProvider:
+    """
+    Hands out a valid access token for one tenant / API key pair.
+    """
+
+    def __init__(self, iam_base, tenant_name, api_key, cache_file=None, refresh_margin=DEFAULT_REFRESH_MARGIN):
+        self.token_url = client.token_url(iam_base, tenant_name)
+        self.api_key = api_key
+        self.cache_file = cache_file
+        self.refresh_margin = refresh_margin
+        # never write the API key itself to disk
+        self._cache_key = hashlib.sha256(f"{self.token_url}|{api_key}".encode("utf-8")).hexdigest()
+        self._token = None
+        self._expires_at = 0
+        self._state_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._background_refresh = None
+        self._loaded_from_disk = False
+
+    def get_token(self):
+        """
+        Returns a valid access token, refreshing it if needed.
+        """
+        if not self._loaded_from_disk:
+            self._load_from_disk()
+
+        with self._state_lock:
+            token, expires_at = self._token, self._expires_at
+        now = time.time()
+
+        if token and now < expires_at - self.refresh_margin:
+            return token
+        if token and now < expires_at:
+            # still usable: serve it and refresh behind the caller's back
+            self._start_background_refresh()
+            return token
+        return self._refresh()
+
+    def invalidate(self):
+        """
+        Drops the cached token, e.g. after the API answered 401.
+        """
+        with self._state_lock:
+            self._token = None
+            self._expires_at = 0
+
+    def _refresh(self):
+        with self._refresh_lock:
+            # another thread may have refreshed while we waited for the lock
+            with self._state_lock:
+                if self._token and time.time() < self._expires_at - self.refresh_margin:
+                    return self._token
+
+            headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+            data = {
+                'grant_type': 'refresh_token',
+                'client_id': 'ast-app',
+                'refresh_token': self.api_key
+            }
+            response = client.post(self.token_url, headers=headers, data=data)
+            if response.status_code != 200:
+                raise Exception(f"Failed to get access token: {response.text}")
+
+            json_response = response.json()
+            token = json_response.get("access_token")
+            if not token:
+                raise Exception("Failed to get access token: access_token not found in the response")
+            expires_in = json_response.get("expires_in") or DEFAULT_EXPIRES_IN
+
+            with self._state_lock:
+                self._token = token
+                self._expires_at = time.time() + expires_in
+            self._save_to_disk()
+            return token
+
+    def _start_background_refresh(self):
+        with self._state_lock:
+            if self._background_refresh is not None and self._background_refresh.is_alive():
+                return
+            self._background_refresh = threading.Thread(target=self._background_worker, daemon=True)
+            self._background_refresh.start()
+
+    def _background_worker(self):
+        try:
+            self._refresh()
+        except Exception as e:
+            # the old token is still valid; the next caller past expiry retries synchronously
+            print(f"Background token refresh failed: {e}")
+
+    def _load_from_disk(self):
+        self._loaded_from_disk = True
+        entry = _read_cache_file(self.cache_file).get(self._cache_key)
+        if not entry:
+            return
+        with self._state_lock:
+            if entry.get("expires_at", 0) > self._expires_at:
+                self._token = entry.get("access_token")
+                self._expires_at = entry["expires_at"]
+
+    def _save_to_disk(self):
+        if not self.cache_file:
+            return
+        try:
+            entries = _read_cache_file(self.cache_file)
+            now = time.time()
+            # drop expired entries while we are rewriting the file anyway
+            entries = {k: v for k, v in entries.items() if v.get("expires_at", 0) > now}
+            with self._state_lock:
+                entries[self._cache_key] = {"access_token": self._token, "expires_at": self._expires_at}
+            _write_cache_file(self.cache_file, entries)
+        except OSError as e:
+            print(f"Could not write token cache {self.cache_file}: {e}")
+
+
+def _read_cache_file(path):
+    if not path:
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_cache_file(path, entries):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def get_provider(iam_base, tenant_name, api_key, cache_file=None):
+    """
+    Returns the shared TokenProvider for (iam_base, tenant_name, api_key).
+
+    cache_file defaults to the CXONE_TOKEN_CACHE environment variable; when
+    neither is set tokens are only cached in memory.
+    """
+    if cache_file is None:
+        cache_file = os.environ.get(TOKEN_CACHE_ENV) or None
+    if cache_file:
+        cache_file = os.path.expanduser(cache_file)
+    key = (iam_base.rstrip("/"), tenant_name, api_key)
+    with _providers_lock:
+        provider = _providers.get(key)
+        if provider is None:
+            provider = TokenProvider(key[0], tenant_name, api_key, cache_file=cache_file)
+            _providers[key] = provider
+    return provider
+
+
+def get_access_token(region, tenant_name, api_key):
+    """
+    Returns a cached or freshly exchanged access token for a region / tenant.
+    """
+    return get_provider(client.iam_base_url(region), tenant_name, api_key).get_token()
@@ -0,0 +1,127 @@
+"""
+Pooled HTTP client shared by every CxOne script.
+
+All requests go through one requests.Session so connections to the AST and
+IAM hosts are kept alive and reused instead of paying a new TCP + TLS
+handshake on every call. The module mirrors the requests API (request, get,
+post, ...) so scripts can swap `requests.get(...)` for `client.get(...)`.
+"""
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = 10
+
+_session = None
+_pool_size = DEFAULT_POOL_SIZE
+_session_lock = threading.Lock()
+
+
+def _is_default_region(region):
+    # the READMEs tell users to pass "" (or " ") for the US1 region
+    return region is None or region.strip() == ""
+
+
+def ast_base_url(region):
+    """
+    Returns the AST API base URL for a region.
+    """
+    if _is_default_region(region):
+        return "https://ast.checkmarx.net"
+    return f"https://{region.strip()}.ast.checkmarx.net"
+
+
+def iam_base_url(region):
+    """
+    Returns the IAM base URL for a region.
+    """
+    if _is_default_region(region):
+        return "https://iam.checkmarx.net"
+    return f"https://{region.strip()}.iam.checkmarx.net"
+
+
+def api_url(region, path):
+    """
+    Builds a full AST API URL, e.g. api_url("us", "/api/projects/").
+    """
+    return ast_base_url(region) + path
+
+
+def token_url(iam_base, tenant_name):
+    """
+    Builds the OpenID Connect token URL for a tenant from an IAM base URL.
+    """
+    return f"{iam_base.rstrip('/')}/auth/realms/{tenant_name}/protocol/openid-connect/token"
+
+
+def create_session(pool_size=DEFAULT_POOL_SIZE):
+    """
+    Creates a requests.Session that keeps up to pool_size connections alive per host.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def configure(pool_size=DEFAULT_POOL_SIZE):
+    """
+    Sets the per-host pool size of the shared session.
+
+    Scripts that fan out over a thread pool should call this with at least
+    their worker count, otherwise extra connections are opened and discarded.
+    """
+    global _session, _pool_size
+    with _session_lock:
+        old_session = _session
+        _session = None
+        _pool_size = pool_size
+    if old_session is not None:
+        old_session.close()
+
+
+def get_session():
+    """
+    Returns the process-wide pooled session, creating it on first use.
+    """
+    global _session
+    session = _session
+    if session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session(_pool_size)
+            session = _session
+    return session
+
+
+def close():
+    """
+    Closes the shared session and its pooled connections.
+    """
+    configure(_pool_size)
+
+
+def request(method, url, **kwargs):
+    return get_session().request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def put(url, **kwargs):
+    return request("PUT", url, **kwargs)
+
+
+def patch(url, **kwargs):
+    return request("PATCH", url, **kwargs)
+
+
+def delete(url, **kwargs):
+    return request("DELETE", url, **kwargs)
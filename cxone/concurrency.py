@@ -0,0 +1,82 @@
+"""
+Adaptive (AIMD) concurrency limiting for threaded workers.
+
+The limit grows by one after each window of `limit` healthy requests and is
+halved when the server throttles (429/5xx), a request fails, or latency rises
+well above the best latency seen so far. A Retry-After from the server pauses
+every worker, not just the one that got it.
+"""
+import threading
+import time
+
+
+class AdaptiveLimiter:
+    """
+    Caps how many requests are in flight. Workers call acquire() before a
+    request and release() after it with the outcome.
+    """
+
+    def __init__(self, initial=4, min_limit=1, max_limit=32, backoff=0.5, latency_tolerance=3.0):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        # latency above tolerance * best smoothed latency counts as congestion; None disables
+        self.latency_tolerance = latency_tolerance
+        self.limit = max(min_limit, min(initial, max_limit))
+        self.peak_limit = self.limit
+        self.decreases = 0
+        self._in_flight = 0
+        self._successes = 0
+        self._latency = None
+        self._best_latency = None
+        self._last_decrease = 0.0
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """
+        Blocks until a request may start.
+        """
+        with self._cond:
+            while True:
+                wait = self._paused_until - time.monotonic()
+                if wait <= 0 and self._in_flight < self.limit:
+                    self._in_flight += 1
+                    return
+                self._cond.wait(wait if wait > 0 else None)
+
+    def release(self, latency=None, throttled=False, retry_after=None):
+        """
+        Records the outcome of a request started with acquire(). throttled marks
+        a 429/5xx or failed request; retry_after (seconds) pauses all workers.
+        """
+        with self._cond:
+            self._in_flight -= 1
+            now = time.monotonic()
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+            if latency is not None and not throttled:
+                self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+                if self._best_latency is None or self._latency < self._best_latency:
+                    self._best_latency = self._latency
+                if self.latency_tolerance and self._latency > self.latency_tolerance * self._best_latency:
+                    throttled = True
+
+            if throttled:
+                self._decrease(now)
+            else:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.max_limit:
+                    self._successes = 0
+                    self.limit += 1
+                    self.peak_limit = max(self.peak_limit, self.limit)
+            self._cond.notify_all()
+
+    def _decrease(self, now):
+        # requests already in flight when we backed off report the same congestion; count it once
+        if now - self._last_decrease < (self._latency or 0.0):
+            return
+        self._last_decrease = now
+        self._successes = 0
+        self.limit = max(self.min_limit, int(self.limit * self.backoff))
+        self.decreases += 1
@@ -0,0 +1,154 @@
+"""
+Cache of project configuration parameters (/api/configuration/project).
+
+Entries are reused for `ttl` seconds. After that they are revalidated with a
+conditional request (If-None-Match / If-Modified-Since) when the server sent
+an ETag or Last-Modified, so an unchanged configuration costs a 304 instead
+of the full parameter list. The cache can be persisted to a JSON file so
+repeated runs (e.g. nightly fleet scans) start warm.
+"""
+import json
+import os
+import threading
+import time
+
+from cxone import client, retry
+
+DEFAULT_CONFIG_CACHE = os.path.join("~", ".cache", "cxone", "project-config.json")
+DEFAULT_CONFIG_TTL = 3600
+
+
+def index_params(params):
+    """
+    Indexes a configuration parameter list by key: {key: parameter dict}.
+    """
+    return {param.get("key"): param for param in params or []}
+
+
+class ProjectConfig:
+    """
+    A project's configuration parameters, indexed by key.
+    """
+
+    def __init__(self, params):
+        self.params = params or []
+        self.by_key = index_params(self.params)
+
+    def value(self, key, default=None):
+        param = self.by_key.get(key)
+        return param.get("value", default) if param is not None else default
+
+    def __iter__(self):
+        return iter(self.params)
+
+    def __len__(self):
+        return len(self.params)
+
+
+class ConfigCache:
+    """
+    Thread-safe project configuration cache keyed by (AST base URL, project ID).
+    """
+
+    def __init__(self, path=None, ttl=DEFAULT_CONFIG_TTL):
+        self.path = os.path.expanduser(path) if path else None
+        self.ttl = ttl
+        self.hits = 0
+        self.revalidated = 0
+        self.fetched = 0
+        self._lock = threading.Lock()
+        self._entries = self._load()
+        # indexed ProjectConfig per entry, built once per fetch rather than per lookup
+        self._configs = {}
+        self._dirty = False
+
+    def _config(self, key, entry):
+        config = self._configs.get(key)
+        if config is None or config.params is not entry["params"]:
+            config = self._configs[key] = ProjectConfig(entry["params"])
+        return config
+
+    def get(self, region, access_token, project_id, max_retries=3):
+        """
+        Returns the ProjectConfig of a project (empty if it has no configuration).
+        """
+        key = f"{client.ast_base_url(region)}|{project_id}"
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and time.time() - entry["fetched"] < self.ttl:
+            with self._lock:
+                self.hits += 1
+                return self._config(key, entry)
+
+        url = client.api_url(region, "/api/configuration/project")
+        headers = {
+            'Authorization': f'Bearer {access_token}',
+            'Accept': '*/*; version=1.0'
+        }
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("lastModified"):
+                headers["If-Modified-Since"] = entry["lastModified"]
+        response = retry.request_with_retry("GET", url, max_retries=max_retries, params={"project-id": project_id}, headers=headers)
+
+        if response.status_code == 304 and entry is not None:
+            with self._lock:
+                entry["fetched"] = time.time()
+                self.revalidated += 1
+                self._dirty = True
+                return self._config(key, entry)
+        if response.status_code == 404:
+            params = []
+        elif response.status_code == 200:
+            params = response.json()
+        else:
+            raise Exception(f"Failed to get project config params for {project_id}: {response.status_code} {response.text}")
+
+        with self._lock:
+            entry = self._entries[key] = {
+                "fetched": time.time(),
+                "etag": response.headers.get("ETag"),
+                "lastModified": response.headers.get("Last-Modified"),
+                "params": params
+            }
+            self.fetched += 1
+            self._dirty = True
+            return self._config(key, entry)
+
+    def invalidate(self, region, project_id):
+        """
+        Drops a project's entry, e.g. after its configuration was changed.
+        """
+        key = f"{client.ast_base_url(region)}|{project_id}"
+        with self._lock:
+            self._configs.pop(key, None)
+            if self._entries.pop(key, None) is not None:
+                self._dirty = True
+
+    def save(self):
+        """
+        Writes the cache file (if the cache has a path and anything changed).
+        """
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps(self._entries)
+            self._dirty = False
+        os.makedirs(os.path.dirname(self.path) or ".", mode=0o700, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    def _load(self):
+        if not self.path:
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+            return entries if isinstance(entries, dict) else {}
+        except (OSError, ValueError):
+            return {}
@@ -0,0 +1,133 @@
+"""
+Streamed file downloads that resume after a dropped connection.
+
+The body is written chunk by chunk to `<path>.part` and only renamed to
+`path` once complete and verified, so readers never see a half-written file
+and memory use is bounded by the chunk size rather than the file size.
+"""
+import base64
+import hashlib
+import os
+import re
+import time
+
+import requests
+
+from cxone import client, retry
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+_CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+
+def _expected_md5(response):
+    """
+    Returns the MD5 hex digest the server advertises for the whole file, if any.
+    """
+    content_md5 = response.headers.get("Content-MD5")
+    if content_md5:
+        try:
+            return base64.b64decode(content_md5).hex()
+        except ValueError:
+            pass
+    for part in response.headers.get("x-goog-hash", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name == "md5" and value:
+            return base64.b64decode(value).hex()
+    # the ETag is not used: for SSE-KMS / SSE-C encrypted S3 objects it is not the MD5 of the content
+    return None
+
+
+def _expected_size(response, offset):
+    if response.status_code == 206:
+        match = _CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+        if match and match.group(3) != "*":
+            return int(match.group(3))
+        return None
+    length = response.headers.get("Content-Length")
+    if length and "Content-Encoding" not in response.headers:
+        return int(length)
+    return None
+
+
+def _hash_existing(path, digest):
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(DEFAULT_CHUNK_SIZE), b""):
+            digest.update(chunk)
+
+
+def download_file(url, path, headers=None, chunk_size=DEFAULT_CHUNK_SIZE, max_attempts=5, expected_sha256=None):
+    """
+    Downloads url to path, resuming from the partial file with an HTTP Range
+    request when the server supports it.
+
+    Size is checked against Content-Length / Content-Range and the content
+    against Content-MD5 or x-goog-hash when the server sends one (and
+    expected_sha256 when the caller knows it). Returns the number of bytes
+    written; raises an Exception if the download cannot be completed.
+    """
+    part_path = path + ".part"
+    last_error = None
+
+    for attempt in range(max_attempts):
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        request_headers = dict(headers or {})
+        if offset:
+            request_headers["Range"] = f"bytes={offset}-"
+
+        try:
+            with client.get(url, headers=request_headers, stream=True) as response:
+                if response.status_code == 416 and offset:
+                    # our partial file does not match the remote one any more
+                    os.remove(part_path)
+                    last_error = "range not satisfiable, restarting download"
+                    continue
+                if response.status_code not in (200, 206):
+                    last_error = f"{response.status_code} {response.text}"
+                    if response.status_code not in retry.RETRY_STATUSES:
+                        break
+                    time.sleep(retry.backoff_delay(attempt))
+                    continue
+
+                if response.status_code == 200:
+                    # server ignored the Range header: start from scratch
+                    offset = 0
+                expected_size = _expected_size(response, offset)
+                expected_md5 = _expected_md5(response)
+
+                md5 = hashlib.md5()
+                sha256 = hashlib.sha256()
+                if offset:
+                    _hash_existing(part_path, md5)
+                    _hash_existing(part_path, sha256)
+
+                with open(part_path, "ab" if offset else "wb") as f:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        f.write(chunk)
+                        md5.update(chunk)
+                        sha256.update(chunk)
+        except requests.RequestException as e:
+            # keep the partial file; the next attempt resumes from its size
+            last_error = str(e)
+            time.sleep(retry.backoff_delay(attempt))
+            continue
+
+        size = os.path.getsize(part_path)
+        if expected_size is not None and size != expected_size:
+            last_error = f"size mismatch: got {size} bytes, expected {expected_size}"
+            if size > expected_size:
+                os.remove(part_path)
+            continue
+        if expected_md5 and md5.hexdigest() != expected_md5:
+            os.remove(part_path)
+            last_error = "MD5 checksum mismatch"
+            continue
+        if expected_sha256 and sha256.hexdigest() != expected_sha256.lower():
+            os.remove(part_path)
+            last_error = "SHA-256 checksum mismatch"
+            continue
+
+        os.replace(part_path, path)
+        return size
+
+    raise Exception(f"Failed to download {url}: {last_error}")
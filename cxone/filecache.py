@@ -0,0 +1,118 @@
+"""
+Local content cache for files that never change once produced (e.g. the SBOM
+of a completed scan).
+
+Entries are addressed by a SHA-256 of the request that produced them and are
+tracked in an index.json next to the files. When the cache grows past
+max_bytes the least recently used entries are evicted.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+DEFAULT_CACHE_DIR = os.path.join("~", ".cache", "cxone")
+INDEX_FILE = "index.json"
+
+
+def cache_key(*parts):
+    """
+    Builds a stable key from JSON-serialisable parts (dicts are key-sorted).
+    """
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class FileCache:
+    """
+    Size-bounded LRU cache of files in a directory.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        self._index = self._load_index()
+
+    def get(self, key):
+        """
+        Returns the path of the cached file for key, or None on a miss.
+        """
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            path = os.path.join(self.directory, key)
+            if not os.path.exists(path):
+                # someone cleaned the directory by hand
+                del self._index[key]
+                self._save_index()
+                return None
+            entry["lastUsed"] = time.time()
+            self._save_index()
+            return path
+
+    def get_metadata(self, key):
+        with self._lock:
+            entry = self._index.get(key)
+            return dict(entry.get("metadata", {})) if entry else None
+
+    def put(self, key, source_path, metadata=None):
+        """
+        Copies source_path into the cache under key and evicts old entries if needed.
+        """
+        path = os.path.join(self.directory, key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, path)
+        with self._lock:
+            now = time.time()
+            self._index[key] = {
+                "size": os.path.getsize(path),
+                "created": now,
+                "lastUsed": now,
+                "metadata": metadata or {}
+            }
+            self._evict()
+            self._save_index()
+        return path
+
+    def copy_to(self, key, destination):
+        """
+        Copies a cached file to destination. Returns False on a miss.
+        """
+        path = self.get(key)
+        if path is None:
+            return False
+        tmp_path = f"{destination}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, destination)
+        return True
+
+    def _evict(self):
+        total = sum(entry["size"] for entry in self._index.values())
+        for key in sorted(self._index, key=lambda k: self._index[k]["lastUsed"]):
+            if total <= self.max_bytes:
+                break
+            total -= self._index.pop(key)["size"]
+            try:
+                os.remove(os.path.join(self.directory, key))
+            except OSError:
+                pass
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE), "r", encoding="utf-8") as f:
+                index = json.load(f)
+            return index if isinstance(index, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        tmp_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, index_path)
@@ -0,0 +1,103 @@
+"""
+Generators that walk offset/limit paginated CxOne endpoints.
+
+Results are yielded page by page, so only the current page (plus the next
+one when prefetching) is ever held in memory, whatever the total count is.
+`headers` may be a function returning the headers; it is called for every
+page, so a long walk picks up refreshed access tokens.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from cxone import retry
+
+DEFAULT_PAGE_SIZE = 500
+
+
+def fetch_page(url, headers, params, offset, limit, items_key, max_retries=3):
+    """
+    Fetches one page and returns (items, totalCount or None).
+    """
+    page_params = dict(params or {})
+    page_params["offset"] = offset
+    page_params["limit"] = limit
+    if callable(headers):
+        headers = headers()
+    response = retry.request_with_retry("GET", url, max_retries=max_retries, params=page_params, headers=headers)
+    if response.status_code != 200:
+        raise Exception(f"Failed to fetch {url} (offset {offset}): {response.status_code} {response.text}")
+    data = response.json()
+    return data.get(items_key) or [], data.get("totalCount")
+
+
+def iter_pages(url, headers, params=None, items_key="results", page_size=DEFAULT_PAGE_SIZE, prefetch=False, max_retries=3):
+    """
+    Yields every page of items from a paginated endpoint.
+
+    With prefetch=True the next page is requested in a background thread
+    while the caller is still processing the current one.
+    """
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        offset = 0
+        pending = None
+        while True:
+            if pending is not None:
+                items, total = pending.result()
+            else:
+                items, total = fetch_page(url, headers, params, offset, page_size, items_key, max_retries)
+
+            offset += page_size
+            has_more = len(items) >= page_size and (total is None or offset < total)
+            pending = None
+            if has_more and executor is not None:
+                pending = executor.submit(fetch_page, url, headers, params, offset, page_size, items_key, max_retries)
+
+            if items:
+                yield items
+            if not has_more:
+                return
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+def fetch_all_pages(url, headers, params=None, items_key="results", page_size=DEFAULT_PAGE_SIZE, workers=4, max_retries=3):
+    """
+    Returns every item of a paginated endpoint. The first page gives the
+    total (filteredTotalCount when the endpoint filters, else totalCount);
+    the remaining pages are then fetched concurrently and joined in order.
+    """
+    page_params = dict(params or {})
+    first = retry.request_with_retry("GET", url, max_retries=max_retries, params=dict(page_params, offset=0, limit=page_size),
+                                     headers=headers() if callable(headers) else headers)
+    if first.status_code != 200:
+        raise Exception(f"Failed to fetch {url} (offset 0): {first.status_code} {first.text}")
+    data = first.json()
+    items = list(data.get(items_key) or [])
+    total = data.get("filteredTotalCount", data.get("totalCount"))
+    if total is None:
+        # no count to plan with: walk the remaining pages one by one
+        offset = page_size
+        page = items
+        while len(page) >= page_size:
+            page, _ = fetch_page(url, headers, page_params, offset, page_size, items_key, max_retries)
+            items.extend(page)
+            offset += page_size
+        return items
+    if len(items) >= total:
+        return items
+
+    offsets = range(page_size, total, page_size)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(offsets)))) as executor:
+        pages = executor.map(lambda offset: fetch_page(url, headers, page_params, offset, page_size, items_key, max_retries)[0], offsets)
+        for page in pages:
+            items.extend(page)
+    return items
+
+
+def iter_items(url, headers, params=None, items_key="results", page_size=DEFAULT_PAGE_SIZE, prefetch=False, max_retries=3):
+    """
+    Yields every item from a paginated endpoint, one at a time.
+    """
+    for page in iter_pages(url, headers, params, items_key, page_size, prefetch, max_retries):
+        yield from page
@@ -0,0 +1,103 @@
+"""
+Adaptive polling intervals for long-running server-side jobs.
+
+The poller records how long jobs of each category (e.g. an SBOM file format)
+took to complete. While a job is younger than the typical completion time it
+sleeps straight through to that point instead of polling; once it is overdue
+the interval grows with the time already spent. Intervals are jittered so
+many pollers started together drift apart.
+"""
+import json
+import random
+import threading
+from collections import deque
+
+DEFAULT_MIN_INTERVAL = 1
+DEFAULT_MAX_INTERVAL = 60
+DEFAULT_JITTER = 0.2
+MAX_SAMPLES = 500
+
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of an already sorted, non-empty list.
+    """
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class AdaptivePoller:
+    """
+    Decides how long to wait before the next status check of a job.
+    """
+
+    def __init__(self, min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL, jitter=DEFAULT_JITTER):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, category, seconds):
+        """
+        Records the observed time-to-complete of one job.
+        """
+        with self._lock:
+            self._samples.setdefault(category, deque(maxlen=MAX_SAMPLES)).append(seconds)
+
+    def next_interval(self, category, elapsed):
+        """
+        Returns the seconds to wait before polling a job that has been running for `elapsed` seconds.
+        """
+        with self._lock:
+            samples = sorted(self._samples.get(category, ()))
+        expected = percentile(samples, 0.5) if samples else None
+
+        if expected is not None and elapsed < expected:
+            # typical jobs are not done yet: sleep until they usually are
+            interval = expected - elapsed
+        else:
+            # overdue (or no history): back off in proportion to the time already spent
+            overdue = elapsed - expected if expected is not None else elapsed
+            interval = overdue / 2
+
+        interval = min(self.max_interval, max(self.min_interval, interval))
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def latency_summary(self):
+        """
+        Returns {category: {count, min, p50, p90, p99, max, mean}} of the observed completion times.
+        """
+        with self._lock:
+            snapshot = {category: sorted(samples) for category, samples in self._samples.items() if samples}
+        return {
+            category: {
+                "count": len(samples),
+                "min": samples[0],
+                "p50": percentile(samples, 0.5),
+                "p90": percentile(samples, 0.9),
+                "p99": percentile(samples, 0.99),
+                "max": samples[-1],
+                "mean": sum(samples) / len(samples)
+            }
+            for category, samples in snapshot.items()
+        }
+
+    def load(self, path):
+        """
+        Loads completion times saved by a previous run; a missing or unreadable file is ignored.
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            for category, samples in data.items():
+                self._samples.setdefault(category, deque(maxlen=MAX_SAMPLES)).extend(float(s) for s in samples)
+
+    def save(self, path):
+        with self._lock:
+            data = {category: list(samples) for category, samples in self._samples.items()}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
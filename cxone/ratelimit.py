@@ -0,0 +1,36 @@
+"""
+Per-host request rate limiting for threaded workers.
+"""
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class RateLimiter:
+    """
+    Token bucket that allows `rate` requests per second to each host, with
+    bursts of up to `burst` requests. A rate of 0 or None disables limiting.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate or 1))
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, url):
+        """
+        Blocks until a request to the host of `url` is allowed.
+        """
+        if not self.rate:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            tokens, last = self._buckets.get(host, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            # reserve our slot even if it is in the future; waiters queue up fairly
+            tokens -= 1
+            self._buckets[host] = (tokens, now)
+        if tokens < 0:
+            time.sleep(-tokens / self.rate)
@@ -0,0 +1,67 @@
+"""
+Retry helpers for calls that may be throttled (429) or hit transient 5xx errors.
+
+Delays use exponential backoff with full jitter so a pool of workers that all
+got throttled at the same moment does not retry in lockstep. A Retry-After
+header from the server always wins over the computed delay.
+"""
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from cxone import client
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def backoff_delay(attempt, base_delay=1, max_delay=60):
+    """
+    Returns a jittered exponential delay for the given (zero-based) attempt.
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def retry_after_seconds(response):
+    """
+    Returns the Retry-After header as seconds, or None if absent or unparseable.
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def request_with_retry(method, url, max_retries=5, base_delay=1, max_delay=60, rate_limiter=None, **kwargs):
+    """
+    Sends a request through the shared client, retrying 429/5xx responses and
+    connection errors. Returns the last response once retries are exhausted.
+    """
+    for attempt in range(max_retries + 1):
+        if rate_limiter is not None:
+            rate_limiter.acquire(url)
+        try:
+            response = client.request(method, url, **kwargs)
+        except requests.RequestException:
+            if attempt == max_retries:
+                raise
+            time.sleep(backoff_delay(attempt, base_delay, max_delay))
+            continue
+
+        if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+            return response
+
+        delay = retry_after_seconds(response)
+        if delay is None:
+            delay = backoff_delay(attempt, base_delay, max_delay)
+        time.sleep(min(delay, max_delay))
+    return response
@@ -0,0 +1,211 @@
+"""
+Scan helpers shared by the scripts: the scan request body (also used by
+cxone.aio) and ScanTracker, which waits on many scans with batched status polls.
+"""
+import copy
+import json
+import os
+import time
+
+from cxone import client, polling, retry
+
+TERMINAL_SCAN_STATUSES = ("Completed", "Failed", "Canceled", "Partial")
+MISSING_SCAN_STATUS = "NotFound"  # status given to tracked scans the API no longer knows
+SCAN_STATUS_BATCH = 100  # scan IDs per status list call
+STATE_SAVE_INTERVAL = 1  # seconds; add() saves at most this often, polls always save
+
+DEFAULT_SCAN_TAGS = {"ScanTag01": "", "ScanSeverity": "high"}
+DEFAULT_SCAN_CONFIG = [
+    {
+        "type": "sast",
+        "value": {
+            "incremental": "false",
+            "presetName": "Checkmarx Default",
+            "engineVerbose": "false"
+        }
+    },
+    {
+        "type": "sca",
+        "value": {
+            "lastSastScanTime": "",
+            "exploitablePath": "false"
+        }
+    }
+]
+
+
+def scan_payload(project_id, scan_type="git", handler=None, tags=None, config=None):
+    """
+    Builds the POST /api/scans/ body, using the default tags and engine config when not given.
+    """
+    return {
+        "project": {"id": project_id},
+        "type": scan_type,
+        "handler": handler if handler is not None else {},
+        "tags": tags if tags is not None else dict(DEFAULT_SCAN_TAGS),
+        "config": config if config is not None else copy.deepcopy(DEFAULT_SCAN_CONFIG)
+    }
+
+
+class ScanTracker:
+    """
+    Waits on many scans at once.
+
+    Status is read with one /api/scans/?scan-ids=... list call per batch of
+    batch_size pending scans, at intervals taken from an AdaptivePoller that
+    learns how long scans take. Finished scans are handed to the callbacks
+    (per scan, and on_finished for all) and yielded by iter_finished(). A
+    scan the list call does not return is read on its own; if that is a 404
+    (deleted, or from another tenant) it finishes with MISSING_SCAN_STATUS.
+    Pending and finished scans are saved to state_file after every poll,
+    keyed by AST base URL and tenant, so a restarted process resumes
+    tracking where it stopped and one file can serve several tenants.
+    """
+
+    def __init__(self, region, token_provider, state_file=None, poller=None, batch_size=SCAN_STATUS_BATCH, on_finished=None,
+                 max_retries=5, tenant=None):
+        self.region = region
+        self.token_provider = token_provider
+        self.state_file = state_file
+        self.state_key = f"{client.ast_base_url(region)}|{tenant or ''}"
+        self.poller = poller or polling.AdaptivePoller(min_interval=5, max_interval=120)
+        self.batch_size = batch_size
+        self.on_finished = on_finished
+        self.max_retries = max_retries
+        self.pending = {}
+        self.finished = {}
+        self._callbacks = {}
+        self._saved_at = 0.0
+        self._load()
+
+    def add(self, scan_id, callback=None):
+        """
+        Starts tracking a scan; callback(scan) is called once it finishes.
+        """
+        if scan_id not in self.pending and scan_id not in self.finished:
+            self.pending[scan_id] = {"addedAt": time.time()}
+        if callback is not None:
+            self._callbacks.setdefault(scan_id, []).append(callback)
+        if time.monotonic() - self._saved_at >= STATE_SAVE_INTERVAL:
+            self.save()
+
+    def _headers(self):
+        return {
+            'Authorization': f'Bearer {self.token_provider.get_token()}',
+            'Accept': 'application/json; version=1.0'
+        }
+
+    def _get_scan(self, scan_id):
+        """
+        Reads one scan; returns None if it does not exist.
+        """
+        url = client.api_url(self.region, f"/api/scans/{scan_id}")
+        response = retry.request_with_retry("GET", url, max_retries=self.max_retries, headers=self._headers())
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            raise Exception(f"Failed to get scan {scan_id}: {response.status_code} {response.text}")
+        return response.json()
+
+    def poll_once(self):
+        """
+        Reads the status of every pending scan and returns the scans that finished.
+        """
+        url = client.api_url(self.region, "/api/scans/")
+        scan_ids = list(self.pending)
+        finished = []
+        for i in range(0, len(scan_ids), self.batch_size):
+            batch = scan_ids[i:i + self.batch_size]
+            params = {"scan-ids": ",".join(batch), "limit": len(batch)}
+            response = retry.request_with_retry("GET", url, max_retries=self.max_retries, params=params, headers=self._headers())
+            if response.status_code != 200:
+                raise Exception(f"Failed to get scan statuses: {response.status_code} {response.text}")
+            returned = set()
+            for scan in response.json().get("scans") or []:
+                returned.add(scan.get("id"))
+                if scan.get("id") in self.pending and scan.get("status") in TERMINAL_SCAN_STATUSES:
+                    finished.append(scan)
+            # without this, a deleted scan (or one from another tenant) would stay pending forever
+            for scan_id in batch:
+                if scan_id not in returned:
+                    scan = self._get_scan(scan_id)
+                    if scan is None:
+                        finished.append({"id": scan_id, "status": MISSING_SCAN_STATUS})
+                    elif scan.get("status") in TERMINAL_SCAN_STATUSES:
+                        finished.append(scan)
+
+        for scan in finished:
+            state = self.pending.pop(scan["id"])
+            if scan["status"] != MISSING_SCAN_STATUS:
+                self.poller.record("scan", time.time() - state["addedAt"])
+            self.finished[scan["id"]] = scan["status"]
+        self.save()
+        for scan in finished:
+            for callback in self._callbacks.pop(scan["id"], []):
+                callback(scan)
+            if self.on_finished is not None:
+                self.on_finished(scan)
+        return finished
+
+    def next_interval(self):
+        """
+        Seconds until the pending scan that is expected to finish first is worth checking.
+        """
+        now = time.time()
+        return min(self.poller.next_interval("scan", now - state["addedAt"]) for state in self.pending.values())
+
+    def iter_finished(self, timeout=None):
+        """
+        Yields each scan as it finishes until none are pending (or timeout seconds pass).
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self.pending:
+            for scan in self.poll_once():
+                yield scan
+            if not self.pending:
+                return
+            wait = self.next_interval()
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def wait(self, timeout=None):
+        """
+        Blocks until every tracked scan finished (or timeout) and returns {scan ID: status}.
+        """
+        for _ in self.iter_finished(timeout):
+            pass
+        return dict(self.finished)
+
+    def save(self):
+        if not self.state_file:
+            return
+        self._saved_at = time.monotonic()
+        # other tenants' entries in the same file are kept as they are
+        data = self._read_state()
+        data[self.state_key] = {"pending": self.pending, "finished": self.finished}
+        tmp_path = self.state_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.state_file)
+
+    def _read_state(self):
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or "pending" in data:
+            # unkeyed state from an older version: we cannot tell whose scans these are
+            return {}
+        return data
+
+    def _load(self):
+        if not self.state_file:
+            return
+        entry = self._read_state().get(self.state_key) or {}
+        self.pending = dict(entry.get("pending", {}))
+        self.finished = dict(entry.get("finished", {}))